@@ -0,0 +1,114 @@
+""" Benchmark the JPEG decoder backends.
+
+Decodes a corpus of frames with every available backend, at full size and at
+a quarter of the size, and reports throughput and latency per resolution.
+
+    python benchmarks/decode_bench.py [--corpus DIR] [--repeat N] [--json FILE]
+
+Without a corpus, synthetic frames are generated at common camera sizes.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qtpy.QtCore import QBuffer, QByteArray, QIODevice, QRect, Qt
+from qtpy.QtGui import QColor, QGuiApplication, QImage, QLinearGradient, QPainter
+
+from microscope.widgets.decoders import DECODERS, available_decoders
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (2592, 1944)]
+
+
+def synthetic_frame(width: int, height: int, quality: int = 85) -> bytes:
+    image = QImage(width, height, QImage.Format_RGB32)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, width, height)
+    gradient.setColorAt(0, QColor(20, 40, 60))
+    gradient.setColorAt(1, QColor(200, 180, 120))
+    painter.fillRect(image.rect(), gradient)
+    rng = random.Random(width * height)
+    for _ in range(400):
+        painter.fillRect(QRect(rng.randrange(width), rng.randrange(height),
+                               rng.randrange(4, 80), rng.randrange(4, 80)),
+                         QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    painter.setPen(Qt.white)
+    painter.drawText(image.rect(), Qt.AlignCenter, f'{width}x{height}')
+    painter.end()
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, 'JPG', quality)
+    return bytes(data)
+
+
+def load_corpus(directory: str):
+    frames = []
+    for path in sorted(Path(directory).glob('*.jp*g')):
+        data = path.read_bytes()
+        image = QImage.fromData(data, 'JPG')
+        frames.append((f'{image.width()}x{image.height()}', data))
+    return frames
+
+
+def run(frames, repeat: int):
+    results = []
+    for name in available_decoders():
+        decoder = DECODERS[name]()
+        for label, data in frames:
+            image = QImage.fromData(data, 'JPG')
+            for scale in (1, 4):
+                size = None if scale == 1 else (image.width() // scale, image.height() // scale)
+                decoder.decode(data, size)
+                latencies = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    decoder.decode(data, size)
+                    latencies.append(time.perf_counter() - start)
+                latencies.sort()
+                total = sum(latencies)
+                results.append({
+                    'decoder': name,
+                    'resolution': label,
+                    'scale': f'1/{scale}',
+                    'fps': repeat / total,
+                    'mpix_per_s': repeat * image.width() * image.height() / total / 1e6,
+                    'p50_ms': statistics.median(latencies) * 1000,
+                    'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='directory of JPEG frames')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    if args.corpus:
+        frames = load_corpus(args.corpus)
+    else:
+        frames = [(f'{w}x{h}', synthetic_frame(w, h)) for w, h in RESOLUTIONS]
+
+    results = run(frames, args.repeat)
+    print(f'{"decoder":<10} {"resolution":<10} {"scale":<6} {"fps":>9} {"MP/s":>9} '
+          f'{"p50 ms":>8} {"p99 ms":>8}')
+    for r in results:
+        print(f'{r["decoder"]:<10} {r["resolution"]:<10} {r["scale"]:<6} {r["fps"]:>9.1f} '
+              f'{r["mpix_per_s"]:>9.1f} {r["p50_ms"]:>8.2f} {r["p99_ms"]:>8.2f}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+""" Benchmark the cold start imports of the widgets and their plugins.
+
+Every scenario runs in a fresh interpreter, so nothing is cached between
+them, and is repeated to take the median:
+
+  package   import microscope.plugins alone
+  monitor   the imports of monitor.py, with plugin specs for its plugins
+  created   as monitor, with the modules of those plugins imported, as when
+            the widgets create them
+  eager     every plugin module imported up front, what importing the
+            package used to do
+
+    python benchmarks/import_bench.py --repeat 10 --json imports.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MONITOR_PLUGINS = ('ZoomPlugin', 'GridPlugin', 'CrossHairPlugin', 'PresetPlugin',
+                   'ScalePlugin', 'HistoryPlugin', 'TogglePlugin')
+HEAVY = ('cv2', 'numpy')
+
+SCENARIOS = {
+    'package': 'import microscope.plugins',
+    'monitor': ('import microscope.microscope, microscope.container, microscope.settings\n'
+                'from microscope.plugins import plugin\n'
+                f'specs = [plugin(name) for name in {MONITOR_PLUGINS!r}]'),
+    'created': ('import microscope.microscope, microscope.container, microscope.settings\n'
+                'from microscope.plugins import plugin\n'
+                f'classes = [plugin(name).load() for name in {MONITOR_PLUGINS!r}]'),
+    'eager': ('import microscope.microscope, microscope.container, microscope.settings\n'
+              'from microscope.plugins import PLUGINS\n'
+              'classes = [spec.load() for spec in PLUGINS.values()]'),
+}
+
+# Runs in the child, times the scenario's imports and reports what got loaded.
+CHILD = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{code}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': len(sys.modules),
+                   'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def run_scenario(name: str) -> dict:
+    code = CHILD.format(root=str(ROOT), code=SCENARIOS[name], heavy=HEAVY)
+    output = subprocess.run([sys.executable, '-c', code], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start import benchmark.')
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"scenario":<10} {"median ms":>10} {"min ms":>8} {"modules":>8}  heavy')
+    for name in args.scenario or list(SCENARIOS):
+        runs = [run_scenario(name) for _ in range(args.repeat)]
+        times = [run['seconds'] for run in runs]
+        result = {'scenario': name, 'median': statistics.median(times), 'min': min(times),
+                  'modules': runs[-1]['modules'], 'heavy': runs[-1]['heavy']}
+        results.append(result)
+        print(f'{name:<10} {result["median"] * 1000:>10.1f} {result["min"] * 1000:>8.1f} '
+              f'{result["modules"]:>8}  {",".join(result["heavy"]) or "-"}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
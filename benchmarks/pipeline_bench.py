@@ -0,0 +1,229 @@
+""" End to end benchmark of the frame pipeline.
+
+Runs headless on the Qt offscreen platform, every scenario in its own process
+so the peak RSS belongs to that scenario alone. A scenario is a resolution, a
+set of plugins and a number of cameras, in one of two modes:
+
+  live      simulated cameras served over HTTP, fetched by VideoThread through
+            the camera hub and rendered by Microscope widgets, latency is from
+            the frame's capture to its pixmap being set.
+  pipeline  no network, JPEG frames are fed straight into updateImageData as
+            fast as the widgets render them, latency is one updateImageData.
+
+    python benchmarks/pipeline_bench.py --json results.json
+    python benchmarks/pipeline_bench.py --compare results.json
+    python benchmarks/pipeline_bench.py --cameras 4 --trace trace.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PLUGINS = ['zoom', 'grid', 'crosshair', 'scale', 'record']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def configure(microscope, width, height, workdir):
+    """ Give each plugin something to do, most are idle until set up. """
+    from qtpy.QtCore import QPoint, QRect
+    for plugin in microscope.plugins:
+        if plugin.name == 'Zoom':
+            plugin.crop = QRect(width // 4, height // 4, width // 2, height // 2)
+        elif plugin.name == 'Grid':
+            plugin.read_settings({'grid_defined': True, 'selector_hidden': True,
+                                  'start': QPoint(10, 10), 'end': QPoint(width // 2, height // 2)})
+        elif plugin.name == 'Record':
+            plugin.filename = str(Path(workdir) / f'{id(microscope)}.mjpg')
+            plugin.recording = True
+
+
+def run_scenario(scenario):
+    from qtpy.QtCore import QByteArray, QTimer
+    from qtpy.QtWidgets import QApplication
+    import microscope.plugins as plugins
+    from microscope.microscope import Microscope
+    from microscope.simcam import SimulatedCamera, start_server
+    from microscope.widgets import timing
+
+    classes = {'zoom': plugins.ZoomPlugin, 'grid': plugins.GridPlugin,
+               'crosshair': plugins.CrossHairPlugin, 'scale': plugins.ScalePlugin,
+               'record': plugins.RecordPlugin}
+    width, height = scenario['width'], scenario['height']
+    warmup = scenario['warmup']
+    latencies = []
+    counting = [False]
+
+    class BenchMicroscope(Microscope):
+        def updateImageData(self, image):
+            start = time.perf_counter()
+            super().updateImageData(image)
+            if not counting[0]:
+                return
+            if scenario['mode'] == 'live':
+                latencies.append(self.frame.latency())
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    app = QApplication(sys.argv[:1])
+    workdir = tempfile.TemporaryDirectory()
+    widgets = []
+    for _ in range(scenario['cameras']):
+        widget = BenchMicroscope(None, viewport=False,
+                                 plugins=[classes[name] for name in scenario['plugins']])
+        widget.fps = scenario['fps']
+        # The widgets are never shown, they must not be paced as hidden.
+        widget.hiddenFps = scenario['fps']
+        configure(widget, width, height, workdir.name)
+        widgets.append(widget)
+
+    def start_counting():
+        counting[0] = True
+        scenario['started'] = time.perf_counter()
+        if scenario.get('trace'):
+            timing.start_trace()
+
+    servers = []
+    if scenario['mode'] == 'live':
+        for i, widget in enumerate(widgets):
+            camera = SimulatedCamera(width, height, fps=scenario['fps'], name=f'cam{i}')
+            server = start_server(camera)
+            servers.append(server)
+            widget.url = server.url(stream=scenario['stream'])
+            widget.acquire(True)
+        QTimer.singleShot(int(warmup * 1000), start_counting)
+        QTimer.singleShot(int((warmup + scenario['duration']) * 1000), app.quit)
+        app.exec_()
+        elapsed = time.perf_counter() - scenario['started']
+        for widget in widgets:
+            widget.acquire(False)
+        for server in servers:
+            server.stop()
+    else:
+        camera = SimulatedCamera(width, height)
+        frames = [camera.render(i) for i in range(8)]
+        end = time.perf_counter() + warmup
+        for i in itertools.count():
+            now = time.perf_counter()
+            if not counting[0] and now >= end:
+                start_counting()
+                end = now + scenario['duration']
+            elif counting[0] and now >= end:
+                break
+            for widget in widgets:
+                widget.updateImageData(QByteArray(frames[i % len(frames)]))
+            app.processEvents()
+        elapsed = time.perf_counter() - scenario['started']
+    workdir.cleanup()
+    if scenario.get('trace'):
+        timing.stop_trace(scenario['trace'])
+
+    scenario.pop('started')
+    frames = len(latencies)
+    return dict(scenario,
+                frames=frames,
+                fps=frames / elapsed,
+                fps_per_camera=frames / elapsed / scenario['cameras'],
+                p50_ms=percentile(latencies, 0.5) * 1000,
+                p99_ms=percentile(latencies, 0.99) * 1000,
+                stages=widgets[0].stats(),
+                # ru_maxrss is in kilobytes on Linux.
+                peak_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def scenario_key(result):
+    return (result['mode'], result['width'], result['height'],
+            '+'.join(result['plugins']) or 'none', result['cameras'])
+
+
+def print_results(results, baseline=None, header=True):
+    old = {scenario_key(r): r for r in baseline or []}
+    if header:
+        print(f'{"mode":<9} {"size":<10} {"plugins":<32} {"cams":>4} {"fps":>8} '
+              f'{"fps/cam":>8} {"p50 ms":>8} {"p99 ms":>8} {"RSS MB":>7}')
+    for r in results:
+        key = scenario_key(r)
+        line = (f'{r["mode"]:<9} {r["width"]}x{r["height"]:<5} {key[3]:<32} {r["cameras"]:>4} '
+                f'{r["fps"]:>8.1f} {r["fps_per_camera"]:>8.1f} {r["p50_ms"]:>8.1f} '
+                f'{r["p99_ms"]:>8.1f} {r["peak_rss_mb"]:>7.0f}')
+        if key in old and old[key]['fps']:
+            line += f'  fps {100 * (r["fps"] / old[key]["fps"] - 1):+.0f}%'
+            if old[key]['p99_ms']:
+                line += f' p99 {100 * (r["p99_ms"] / old[key]["p99_ms"] - 1):+.0f}%'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End to end frame pipeline benchmark.')
+    parser.add_argument('--mode', choices=['live', 'pipeline'], action='append')
+    parser.add_argument('--sizes', default='640x480,1920x1080')
+    parser.add_argument('--plugins', action='append',
+                        help=f'comma separated set from {",".join(PLUGINS)}, '
+                             'repeat for more sets, "none" for no plugins')
+    parser.add_argument('--cameras', default='1,9,36')
+    parser.add_argument('--fps', type=int, default=30, help='camera and widget frame rate')
+    parser.add_argument('--stream', action='store_true', help='use MJPEG instead of snapshots')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--trace', help='write a Chrome trace of each scenario, '
+                                        'the scenario number is added to the name')
+    parser.add_argument('--compare', help='results of an earlier run to compare against')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_scenario(json.loads(args.run))))
+        return
+
+    plugin_sets = args.plugins or ['none', 'zoom', 'grid,crosshair,scale', ','.join(PLUGINS)]
+    plugin_sets = [[] if s == 'none' else s.split(',') for s in plugin_sets]
+    sizes = [tuple(int(v) for v in s.split('x')) for s in args.sizes.split(',')]
+    cameras = [int(c) for c in args.cameras.split(',')]
+
+    results = []
+    for i, (mode, (width, height), plugins, count) in enumerate(itertools.product(
+            args.mode or ['live'], sizes, plugin_sets, cameras)):
+        scenario = {'mode': mode, 'width': width, 'height': height, 'plugins': plugins,
+                    'cameras': count, 'fps': args.fps, 'stream': args.stream,
+                    'duration': args.duration, 'warmup': args.warmup}
+        if args.trace:
+            trace = Path(args.trace).resolve()
+            scenario['trace'] = str(trace.with_name(f'{trace.stem}-{i}{trace.suffix}'))
+        output = subprocess.run([sys.executable, __file__, '--run', json.dumps(scenario)],
+                                stdout=subprocess.PIPE, cwd=ROOT, check=True).stdout
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+        print_results(results[-1:], header=len(results) == 1)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        print_results(results, baseline)
+    if args.json:
+        from qtpy import API_NAME
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'qt': API_NAME,
+                       'machine': platform.machine(), 'time': time.time(),
+                       'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
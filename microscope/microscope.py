@@ -1,17 +1,27 @@
+import time
 from collections.abc import Iterable
-from qtpy.QtCore import Signal, QByteArray, QPoint, QSize, QSettings, QEvent
+from qtpy.QtCore import Signal, QByteArray, QPoint, QRect, QSize, QSettings, QEvent, Qt
 from qtpy.QtGui import (QImage, QPainter, 
-                        QContextMenuEvent, QMouseEvent, QPixmap)
+                        QContextMenuEvent, QMouseEvent)
 from qtpy.QtWidgets import (QWidget, QMenu, QAction, QGraphicsView,
-                            QGraphicsScene, QGraphicsPixmapItem, QVBoxLayout)
-from typing import List, Any, Dict, Optional
-from .widgets.downloader import VideoThread
+                            QGraphicsScene, QGraphicsItem, QGraphicsSimpleTextItem,
+                            QVBoxLayout)
+from typing import List, Any, Dict, Optional, Tuple, Union
+from .widgets.hub import hub, Subscription
+from .widgets.downloader import decode_jpeg
+from .widgets.decoders import clamp_crop, jpeg_size
+from .widgets.frame import Frame
+from .widgets.history import FrameHistory, FrameRecord
+from .widgets.timing import Histogram, StageTimings
+from .widgets.image_item import ImageItem
+from .widgets.budget import PluginBudget
 from .plugins.base_plugin import BasePlugin
 from .plugin_settings import PluginSettingsDialog
 
 class Microscope(QWidget):
     roiClicked: Signal = Signal(int, int)
     clicked_url: Signal = Signal(str)
+    statsUpdated: Signal = Signal(dict)
     
     def __init__(self, parent:Optional[QWidget]=None, 
                  viewport:bool=True, plugins: List[BasePlugin]=list()) -> None:
@@ -21,7 +31,7 @@ class Microscope(QWidget):
         self.setMinimumWidth(300)
         self.setMinimumHeight(300)
         self.image = QImage('image.jpg')
-        self.pixmap = QGraphicsPixmapItem(None)
+        self.pixmap = ImageItem()
         self.scene = QGraphicsScene(self)
         self.view = QGraphicsView(self.scene)
         self.view.setRenderHints(QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
@@ -35,42 +45,175 @@ class Microscope(QWidget):
         self.color: bool = False
         self.fps: int = 5
         self.scale: List[int] = []
+        self.backend: str = 'thread'
+        # Where frames are resampled to the scale: 'worker' in the acquisition
+        # thread, 'view' only by the image item's transform when painting.
+        self.scaleMode: str = 'worker'
+        self.adaptive: bool = False
+        self.priority: int = 0
+        # Rate while nothing of the view can be seen, 0 pauses the camera.
+        self.hiddenFps: float = 1.0
+        self.shown: bool = True
+        # Until the first show event the widget is not treated as hidden, it
+        # may be used offscreen or not be laid out yet.
+        self.everShown: bool = False
         
         self.url: str = 'http://localhost:8080/output.jpg'
 
         #self.downloader = Downloader(self)
         #self.downloader.imageReady.connect(self.updateImageData)
-        self.videoThread = VideoThread(fps=self.fps, url=self.url, parent=self)
-        self.videoThread.imageReady.connect(self.updateImageData)
+        self.subscription: Optional[Subscription] = None
+        # The history frame being shown, None while showing the live camera.
+        self.playback: Optional[FrameRecord] = None
+        # The frame being shown, plugins read its metadata from here.
+        self.frame: Optional[Frame] = None
+        # Per stage timings of this view, statsUpdated is emitted at most once
+        # every statsInterval seconds.
+        self.timings = StageTimings(self.url)
+        self.latency = Histogram()
+        self.statsInterval: float = 1.0
+        self._statsAt: float = 0.0
 
         #self.timer = QTimer(self)
         #self.timer.timeout.connect(self.downloader.downloadData)
 
+        # Cost and time budget of each plugin, by name.
+        self.budgets: Dict[str, PluginBudget] = {}
+        self.warningItem: Optional[QGraphicsSimpleTextItem] = None
+
         self.plugins: List[BasePlugin] = []
         for plugin_cls in self.plugin_classes:
             self.plugins.append(plugin_cls(self))
+        self.updatePluginHooks()
 
         self.view.viewport().installEventFilter(self)
 
 
     def updatedImageSize(self) -> None:
-        if self.image.size() != self.minimumSize():
-            self.setMinimumSize(self.image.size())
+        size = self.displaySize()
+        if size != self.minimumSize():
+            self.setMinimumSize(size)
             self.center = QPoint(
-                int(self.image.size().width() / 2), 
-                int(self.image.size().height() / 2)
+                int(size.width() / 2), 
+                int(size.height() / 2)
             )
 
     def acquire(self, start: bool=True) -> None:
         #self.downloader.setUrl(self.url)
         #print(self.url)
         if start:
-            self.videoThread.setUrl(self.url)
-            self.videoThread.setFPS(self.fps)
-            self.videoThread.start()
-        elif self.videoThread.isRunning() and not start:
-            self.videoThread.stop()
-            self.videoThread.wait(500)
+            if self.subscription and self.subscription.url != self.url:
+                self.acquire(False)
+            if self.subscription is None:
+                self.subscription = hub.subscribe(self.url, self.fps, backend=self.backend,
+                                                  adaptive=self.adaptive, priority=self.priority)
+                if self.timings.name != self.url:
+                    self.timings.name = self.url
+                    self.timings.reset()
+                    self.latency = Histogram()
+                self.subscription.timings = self.timings
+                self.subscription.frameAvailable.connect(self.drainMailbox)
+            else:
+                self.subscription.adaptive = self.adaptive
+                self.subscription.priority = self.priority
+            self.subscription.resample = self.scaleMode == 'worker'
+            self.shown = self.isShown()
+            self.applyVisibility()
+            self.updateSubscription()
+        elif self.subscription:
+            hub.unsubscribe(self.subscription)
+            self.subscription = None
+
+    def isShown(self) -> bool:
+        """ True if any part of the view can be seen on screen. """
+        if not self.everShown:
+            return True
+        return (self.isVisible() and not self.window().isMinimized()
+                and not self.visibleRegion().isEmpty())
+
+    def updateVisibility(self) -> None:
+        """ Slow down or pause the camera while the view cannot be seen.
+
+        Coming back into view shows the newest frame the camera has straight
+        away, without waiting for the next fetch.
+        """
+        shown = self.isShown()
+        if shown == self.shown:
+            return
+        self.shown = shown
+        self.applyVisibility()
+        if shown:
+            self.showLatest()
+
+    def applyVisibility(self) -> None:
+        if self.subscription is None:
+            return
+        hidden = not self.shown
+        hub.setPaused(self.subscription, hidden and self.hiddenFps <= 0)
+        if hidden and self.hiddenFps > 0:
+            hub.setFPS(self.subscription, min(self.fps, self.hiddenFps))
+        else:
+            hub.setFPS(self.subscription, self.fps)
+
+    def showLatest(self) -> None:
+        history = self.history()
+        record = history.latest() if history else None
+        if (record is not None and self.playback is None
+                and (self.frame is None or record.sequence > self.frame.sequence)):
+            self.updateImageData(self.frameFromRecord(record))
+        self.refresh()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.everShown = True
+        self.updateVisibility()
+
+    def hideEvent(self, event) -> None:
+        super().hideEvent(event)
+        self.updateVisibility()
+
+    def refresh(self) -> None:
+        """ Push the next frame through the pipeline even if the camera image is static. """
+        if self.subscription is None:
+            return
+        self.updateSubscription()
+        source = hub.source(self.subscription.url)
+        if source is not None:
+            source.invalidate()
+
+    def updateSubscription(self) -> None:
+        """ Tell the hub how the plugins need the frames prepared. """
+        self.subscription.scale = self.subscriptionScale()
+        self.subscription.crop = self.subscriptionCrop()
+        self.subscription.framePlugins = tuple(self.framePlugins)
+
+    def subscriptionScale(self) -> List[int]:
+        """ The downscale the camera hub may apply before the plugins run. """
+        crop = self.subscriptionCrop()
+        for plugin in self.activePlugins():
+            # A crop decoded by the source is already at full resolution.
+            if plugin.needs_full_resolution() and (crop is None or plugin.decode_crop() != crop):
+                return []
+        return self.scale
+
+    def activePlugins(self) -> List[BasePlugin]:
+        """ The plugins not disabled, by their budget or by hand. """
+        return [p for p in self.plugins
+                if p.name not in self.budgets or not self.budgets[p.name].disabled]
+
+    def subscriptionCrop(self) -> Optional[Tuple[int, int, int, int]]:
+        """ The region of the frame the camera hub may decode alone.
+
+        Only a crop asked for before any plugin changes the image can be
+        pushed into the decode, and none by a disabled plugin.
+        """
+        for plugin in self.activePlugins():
+            crop = plugin.decode_crop()
+            if crop is not None:
+                return crop
+            if plugin.updates_image and plugin.handles('update_image_data'):
+                return None
+        return None
         
     def eventFilter(self, obj, event):
         if obj is self.view.viewport():
@@ -82,6 +225,9 @@ class Microscope(QWidget):
                 self.mouse_move_event(event)
             if event.type() == QEvent.Wheel:
                 self.mouse_wheel_event(event)
+            if event.type() == QEvent.Paint and not self.shown:
+                # Uncovered or scrolled back into view.
+                self.updateVisibility()
         return QWidget.eventFilter(self, obj, event)
 
     def mouse_wheel_event(self, event):
@@ -115,16 +261,59 @@ class Microscope(QWidget):
         if self.viewport:
             self.clicked_url.emit(self.settings_group)
         
-        for plugin in self.plugins:
-            plugin.mouse_press_event(a0)
+        self.callMouseHooks(self.mousePressHooks, a0)
 
     def mouse_move_event(self, a0: QMouseEvent):
-        for plugin in self.plugins:
-            plugin.mouse_move_event(a0)
+        self.callMouseHooks(self.mouseMoveHooks, a0)
         
     def mouse_release_event(self, a0: QMouseEvent) -> None:
-        for plugin in self.plugins:
-            plugin.mouse_release_event(a0) 
+        self.callMouseHooks(self.mouseReleaseHooks, a0)
+
+    def callMouseHooks(self, hooks, a0: QMouseEvent) -> None:
+        for hook, budget in hooks:
+            if budget.disabled:
+                continue
+            start = time.perf_counter()
+            hook(a0)
+            budget.recordEvent(time.perf_counter() - start)
+
+    def chargePlugin(self, budget: PluginBudget, seconds: float) -> None:
+        """ Count an update_image_data call against its plugin's budget. """
+        if budget.record(seconds):
+            print(budget.warning())
+            self.showWarning(budget.warning())
+
+    def showWarning(self, message: str) -> None:
+        """ Show a message over the image, an empty one hides it. """
+        if self.warningItem is None:
+            self.warningItem = QGraphicsSimpleTextItem()
+            self.warningItem.setBrush(Qt.red)
+            self.warningItem.setPos(4, 4)
+            self.warningItem.setZValue(100)
+            # Readable whatever the view is zoomed to.
+            self.warningItem.setFlag(QGraphicsItem.ItemIgnoresTransformations)
+            self.scene.addItem(self.warningItem)
+        self.warningItem.setText(message)
+        self.warningItem.setVisible(bool(message))
+
+    def updatePluginHooks(self) -> None:
+        """ Collect the plugins using each hook, call when self.plugins changes. """
+        for p in self.plugins:
+            if p.name not in self.budgets:
+                self.budgets[p.name] = PluginBudget(p.name)
+
+        def hooks(name):
+            return [(getattr(p, name), self.budgets[p.name]) for p in self.plugins
+                    if p.handles(name)]
+        self.mousePressHooks = hooks('mouse_press_event')
+        self.mouseMoveHooks = hooks('mouse_move_event')
+        self.mouseReleaseHooks = hooks('mouse_release_event')
+        # Bound methods, their timing names and budgets, in plugin order.
+        self.imageHooks = [(p.update_image_data, 'plugin:' + p.name, self.budgets[p.name])
+                           for p in self.plugins
+                           if p.updates_image and p.handles('update_image_data')]
+        # Run by the subscription in the acquisition thread.
+        self.framePlugins = [p for p in self.plugins if p.processes_frames]
     
     def contextMenuEvent(self, a0: QContextMenuEvent) -> None:
         """Add entries into the context menu based on plugins used
@@ -156,52 +345,205 @@ class Microscope(QWidget):
             self.menu.addMenu(item)
 
     def _config_plugins(self):
-        plugin_settings_dialog = PluginSettingsDialog(parent=self, plugins=self.plugins)
+        plugin_settings_dialog = PluginSettingsDialog(parent=self, plugins=self.plugins,
+                                                      budgets=self.budgets)
+        plugin_settings_dialog.accepted.connect(self.budgetsChanged)
+        plugin_settings_dialog.budgetsApplied.connect(self.budgetsChanged)
+
+    def budgetsChanged(self) -> None:
+        """ Hide the warning once no plugin is disabled any more. """
+        disabled = [b for b in self.budgets.values() if b.disabledBy == 'budget']
+        self.showWarning(disabled[0].warning() if disabled else '')
         
 
     def sizeHint(self) -> QSize:
         return QSize(400, 400)
         
 
-    def updateImageData(self, image: QImage):
-        """ Triggered when the new image is ready, update the view. """
-        if isinstance(image, QByteArray):
-            self.image.loadFromData(image, 'JPG')
+    def drainMailbox(self) -> None:
+        """ Render the newest frame left by the camera hub, if any. """
+        if self.subscription is None:
+            return
+        frame = self.subscription.take()
+        if frame is not None and self.playback is None:
+            self.timings.record('queue', self.subscription.offeredAt, time.perf_counter())
+            start = time.thread_time()
+            self.updateImageData(frame)
+            self.subscription.reportRender(time.thread_time() - start)
+            self.updateSubscription()
+            # Covered or scrolled out of view, nothing else reports that.
+            self.updateVisibility()
+            if time.monotonic() - self._statsAt >= self.statsInterval:
+                self._statsAt = time.monotonic()
+                self.statsUpdated.emit(self.stats())
+
+    def stats(self) -> Dict[str, Any]:
+        """ Timing histograms of the camera source and of this view.
+
+        Each stage maps to its sample count and the mean, p50, p99 and max
+        durations in seconds, latency is from capture to the frame being shown.
+        plugins has the same for all hook calls of each plugin, with its budget.
+        deadlines counts the frames the camera source and this view's rate cap
+        did not get to in time, late, and the deadlines they skipped, dropped.
+        """
+        stats: Dict[str, Any] = {'url': self.url, 'camera': {}, 'view': self.timings.summary(),
+                                 'latency': self.latency.summary(), 'deadlines': {},
+                                 'plugins': {name: budget.summary()
+                                             for name, budget in self.budgets.items()}}
+        source = hub.source(self.url)
+        if source is not None:
+            stats['camera'] = source.timings.summary()
+            stats['deadlines']['camera'] = {'late': source.scheduler.late,
+                                            'dropped': source.scheduler.dropped}
+        if self.subscription is not None:
+            stats['delivered'] = self.subscription.delivered
+            stats['dropped'] = self.subscription.dropped
+            stats['deadlines']['view'] = {'late': self.subscription.scheduler.late,
+                                          'dropped': self.subscription.scheduler.dropped}
+        return stats
+
+    def history(self) -> Optional[FrameHistory]:
+        """ The compressed frame history of the camera being shown. """
+        if self.subscription is None:
+            return None
+        source = hub.source(self.subscription.url)
+        return source.history if source else None
+
+    def showRecord(self, record: FrameRecord) -> None:
+        """ Pause the live view and show a frame from the history. """
+        self.playback = record
+        self.updateImageData(self.frameFromRecord(record))
+
+    def frameFromRecord(self, record: FrameRecord) -> Frame:
+        """ Decode a frame kept in the history. """
+        size = self.subscription.decodeSize() if self.subscription else None
+        frame = Frame(self.url, record.sequence, record.timestamp, record.data)
+        frame.size = jpeg_size(record.data) or (0, 0)
+        if frame.size != (0, 0):
+            frame.crop = clamp_crop(self.subscriptionCrop(), *frame.size)
+        frame.setImage(decode_jpeg(record.data, size, frame.crop))
+        return frame
+
+    def rewind(self, seconds: float) -> None:
+        """ Show the frame from that many seconds before the current one. """
+        history = self.history()
+        if history is None:
+            return
+        current = self.playback.timestamp if self.playback else time.time()
+        record = history.at(current - seconds)
+        if record:
+            self.showRecord(record)
+
+    def step(self, frames: int) -> None:
+        """ Move through the history frame by frame, negative is backwards. """
+        history = self.history()
+        if history is None:
+            return
+        current = self.playback or history.latest()
+        if current:
+            self.showRecord(history.get(current.sequence + frames))
+
+    def live(self) -> None:
+        """ Go back to showing the camera as it arrives. """
+        self.playback = None
+        self.refresh()
+
+    def saveHistory(self, filename: str, start: float = 0.0, end: float = float('inf')) -> int:
+        history = self.history()
+        if history is None:
+            return 0
+        return history.save(filename, start, end)
+
+    def updateImageData(self, image: Union[Frame, QImage, QByteArray]):
+        """ Triggered when the new image is ready, update the view.
+
+        A bare QImage or compressed QByteArray is wrapped in a Frame, so the
+        plugins can always find the frame being shown in self.frame.
+        """
+        timings = self.timings
+        start = time.perf_counter()
+        if isinstance(image, Frame):
+            frame = image
+        elif isinstance(image, QByteArray):
+            frame = Frame(self.url, data=bytes(image))
+            frame.size = jpeg_size(frame.data) or (0, 0)
+            frame.setImage(decode_jpeg(frame.data))
+            timings.record('decode', start, time.perf_counter())
         else:
-            self.image = image
+            frame = Frame(self.url, image=image)
+        self.frame = frame
+        self.image = frame.image
         
+        # What the frame plugins found, they already ran in the worker.
+        for plugin in self.framePlugins:
+            if plugin in frame.results:
+                plugin.show_result(frame.results[plugin])
+
         #Loop through plugins to process video image
-        for plugin in self.plugins:
-            if plugin.updates_image:
-                self.image = plugin.update_image_data(self.image)
+        for hook, stage, budget in self.imageHooks:
+            if not budget.due():
+                # The live frame goes on without it, what the plugin drew
+                # into the scene stays until it next runs.
+                continue
+            start = time.perf_counter()
+            image = hook(self.image)
+            end = time.perf_counter()
+            timings.record(stage, start, end)
+            self.chargePlugin(budget, end - start)
+            self.image = image
 
-        if len(self.scale) == 2:
-            if self.scale[0] > 0:
-                self.image = self.image.scaledToWidth(self.scale[0])
-            elif self.scale[1] > 0:
-                self.image = self.image.scaledToHeight(self.scale[1])
+        # No resampling here, whatever the worker did not already scale is
+        # fitted by the item's transform when painted.
+        start = time.perf_counter()
+        resized = self.pixmap.setImage(self.image)
+        timings.record('upload', start, time.perf_counter())
+        # The scene and widget geometry only change with the frame size, the
+        # item schedules the repaint of the viewport itself.
+        if self.fitImage() or resized:
+            start = time.perf_counter()
+            self.layoutImage()
+            timings.record('layout', start, time.perf_counter())
+        frame.image = self.image
+        if frame.sequence >= 0 and self.playback is None:
+            self.latency.add(frame.latency())
+
+        
 
+    def resizeImage(self):
+        if self.fitImage():
+            self.layoutImage()
+
+    def displayScale(self, size: QSize) -> float:
+        """ The factor that fits an image of that size to the configured scale. """
+        if len(self.scale) == 2 and size.width() > 0 and size.height() > 0:
+            if self.scale[0] > 0:
+                return self.scale[0] / size.width()
+            if self.scale[1] > 0:
+                return self.scale[1] / size.height()
+        return 1.0
+
+    def displaySize(self) -> QSize:
+        """ Size of the image as shown, after the item's transform. """
+        return self.pixmap.sceneBoundingRect().size().toSize()
+
+    def fitImage(self) -> bool:
+        """ Scale the image item to fit, returning True if its size changed. """
+        factor = self.displayScale(self.pixmap.pixmap().size())
+        if factor == self.pixmap.scale():
+            return False
+        self.pixmap.setScale(factor)
+        return True
+
+    def layoutImage(self) -> None:
         self.updatedImageSize()
         #self.view.setFixedSize(self.image.size())
-        pixmap = QPixmap.fromImage(self.image)
-        self.pixmap.setPixmap(pixmap)
-        self.scene.setSceneRect(self.pixmap.boundingRect())
-        rect = self.image.rect()
-        ht = self.image.rect().height()
-        wd = self.image.rect().width()
+        self.scene.setSceneRect(self.pixmap.sceneBoundingRect())
+        rect = QRect(QPoint(0, 0), self.displaySize())
+        ht = rect.height()
+        wd = rect.width()
         rect.setHeight(ht + 2)
         rect.setWidth(wd + 2)
         self.view.setGeometry(rect)
-        self.update()
-
-        
-
-    def resizeImage(self):
-        if len(self.scale) == 2:
-            if self.scale[0] > 0:
-                self.image = self.image.scaledToWidth(self.scale[0])
-            elif self.scale[1] > 0:
-                self.image = self.image.scaledToHeight(self.scale[1])
 
     def readFromDict(self, settings: Dict[Any, Any]):
         """ Read the settings from a Python dict. """
@@ -215,6 +557,18 @@ class Microscope(QWidget):
             self.yDivs = settings['yDivs']
         if settings.has_key('color'):
             self.color = settings['color']
+        if settings.has_key('backend'):
+            self.backend = settings['backend']
+        if settings.has_key('adaptive'):
+            self.adaptive = settings['adaptive']
+        if settings.has_key('priority'):
+            self.priority = settings['priority']
+        if settings.has_key('hiddenFps'):
+            self.hiddenFps = settings['hiddenFps']
+        if settings.has_key('scaleMode'):
+            self.scaleMode = settings['scaleMode']
+        if settings.has_key('pluginBudgets'):
+            self.readBudgets(settings['pluginBudgets'])
         if settings.has_key('scaleW'):
             self.scale = [ settings['scaleW'], 200 ]
         if settings.has_key('scaleH'):
@@ -231,13 +585,29 @@ class Microscope(QWidget):
             'fps': self.fps,
             'xDivs': self.xDivs,
             'yDivs': self.yDivs,
-            'color': self.color
+            'color': self.color,
+            'backend': self.backend,
+            'adaptive': self.adaptive,
+            'priority': self.priority,
+            'hiddenFps': self.hiddenFps,
+            'scaleMode': self.scaleMode,
+            'pluginBudgets': self.writeBudgets()
         }
         if len(self.scale) == 2:
             settings['scaleW'] = self.scale[0]
             settings['scaleH'] = self.scale[1]
         return settings
 
+    def readBudgets(self, budgets: Dict[str, Any]) -> None:
+        for name, values in budgets.items():
+            if name in self.budgets:
+                self.budgets[name].applySettings(values)
+
+    def writeBudgets(self) -> Dict[str, Any]:
+        """ Only the plugins that have a budget are saved. """
+        return {name: budget.settings() for name, budget in self.budgets.items()
+                if budget.budget > 0}
+
     def readSettings(self, settings: QSettings):
         """ Read the settings for this microscope instance. """
         self.settings_group = settings.group() # Keep a copy
@@ -247,6 +617,12 @@ class Microscope(QWidget):
         self.xDivs = settings.value('xDivs', 5, type=int)
         self.yDivs = settings.value('yDivs', 5, type=int)
         self.color = settings.value('color', False, type=bool)
+        self.backend = settings.value('backend', 'thread', type=str)
+        self.adaptive = settings.value('adaptive', False, type=bool)
+        self.priority = settings.value('priority', self.priority, type=int)
+        self.hiddenFps = settings.value('hiddenFps', self.hiddenFps, type=float)
+        self.scaleMode = settings.value('scaleMode', self.scaleMode, type=str)
+        self.readBudgets(settings.value('pluginBudgets', {}) or {})
 
         for plugin in self.plugins:
             settings.beginGroup(plugin.name)
@@ -277,6 +653,12 @@ class Microscope(QWidget):
         settings.setValue('xDivs', self.xDivs)
         settings.setValue('yDivs', self.yDivs)
         settings.setValue('color', self.color)
+        settings.setValue('backend', self.backend)
+        settings.setValue('adaptive', self.adaptive)
+        settings.setValue('priority', self.priority)
+        settings.setValue('hiddenFps', self.hiddenFps)
+        settings.setValue('scaleMode', self.scaleMode)
+        settings.setValue('pluginBudgets', self.writeBudgets())
         if len(self.scale) == 2:
             print(f"Writing {self.settings_group} {self.scale}")
             settings.setValue('scaleW', self.scale[0])
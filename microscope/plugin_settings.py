@@ -1,26 +1,42 @@
-from qtpy.QtCore import Signal
+from qtpy.QtCore import Signal, QTimer
 from qtpy.QtWidgets import (
+    QCheckBox,
+    QComboBox,
     QDialog,
+    QDoubleSpinBox,
     QFormLayout,
     QHBoxLayout,
+    QLabel,
     QVBoxLayout,
     QPushButton,
     QGroupBox
 )
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from microscope.plugins.base_plugin import BasePlugin
+from microscope.widgets.budget import PluginBudget
 
 class PluginSettingsDialog(QDialog):
-    def __init__(self, parent = None, plugins=None) -> None:
+    # Emitted after the budgets were changed with Apply or OK.
+    budgetsApplied = Signal()
+
+    def __init__(self, parent = None, plugins=None,
+                 budgets: Optional[Dict[str, PluginBudget]] = None) -> None:
         super().__init__(parent)
         if plugins:
             self.plugins = plugins
         else:
             self.plugins = []
+        self.budgets = budgets or {}
 
         self.plugin_groupboxes: Dict[BasePlugin, Optional[QGroupBox]] = {}
         for plugin in self.plugins:
             self.plugin_groupboxes[plugin] = plugin.add_settings(parent=self)
+
+        # Per plugin statistics label, budget, policy and enabled controls.
+        self.budget_controls: Dict[str, Tuple[QLabel, QDoubleSpinBox, QComboBox, QCheckBox]] = {}
+        self.was_enabled: Dict[str, bool] = {}
+        self.statsTimer = QTimer(self)
+        self.statsTimer.timeout.connect(self.updateStats)
         
         self.setModal(True)
 
@@ -42,6 +58,10 @@ class PluginSettingsDialog(QDialog):
         vbox = QVBoxLayout()
         formLayout = self.generate_layout()
         vbox.addLayout(formLayout)
+        if self.budgets:
+            vbox.addWidget(self.generate_budgets())
+            self.updateStats()
+            self.statsTimer.start(1000)
         vbox.addLayout(hbox)
         self.setLayout(vbox)
         
@@ -55,6 +75,51 @@ class PluginSettingsDialog(QDialog):
 
         return layout
 
+    def generate_budgets(self) -> QGroupBox:
+        groupbox = QGroupBox('Performance', self)
+        layout = QFormLayout()
+        for plugin in self.plugins:
+            budget = self.budgets.get(plugin.name)
+            if budget is None or plugin.name in self.budget_controls:
+                continue
+            stats = QLabel()
+            limit = QDoubleSpinBox()
+            limit.setRange(0, 1000)
+            limit.setDecimals(1)
+            limit.setSuffix(' ms')
+            limit.setSpecialValueText('No budget')
+            limit.setValue(budget.budget * 1000)
+            policy = QComboBox()
+            policy.addItem('Skip frames', 'throttle')
+            policy.addItem('Disable', 'disable')
+            policy.setCurrentIndex(max(0, policy.findData(budget.policy)))
+            enabled = QCheckBox('Enabled')
+            enabled.setChecked(not budget.disabled)
+            row = QHBoxLayout()
+            row.addWidget(stats, 1)
+            row.addWidget(limit)
+            row.addWidget(policy)
+            row.addWidget(enabled)
+            layout.addRow(plugin.name, row)
+            self.budget_controls[plugin.name] = (stats, limit, policy, enabled)
+            self.was_enabled[plugin.name] = enabled.isChecked()
+        groupbox.setLayout(layout)
+        return groupbox
+
+    def updateStats(self):
+        for name, (stats, _, _, _) in self.budget_controls.items():
+            budget = self.budgets[name]
+            summary = budget.summary()
+            text = (f"mean {summary['mean'] * 1000:.2f} ms, p99 {summary['p99'] * 1000:.2f} ms, "
+                    f"{summary['count']} calls")
+            if budget.disabledBy == 'budget':
+                text += ', disabled: over budget'
+            elif budget.disabled:
+                text += ', disabled'
+            elif budget.every > 1:
+                text += f', every {budget.every} frames'
+            stats.setText(text)
+
     def okClicked(self):
         self.applyClicked()
         self.accept()
@@ -63,6 +128,22 @@ class PluginSettingsDialog(QDialog):
         for plugin, widget in self.plugin_groupboxes.items():
             if widget:
                 plugin.save_settings(widget)
+        if self.budget_controls:
+            self.applyBudgets()
+
+    def applyBudgets(self):
+        for name, (_, limit, policy, enabled) in self.budget_controls.items():
+            budget = self.budgets[name]
+            budget.applySettings({'budget': limit.value() / 1000, 'policy': policy.currentData()})
+            # Only a change of the box counts, the plugin may have been
+            # disabled for going over budget since the dialog opened.
+            if enabled.isChecked() != self.was_enabled[name]:
+                if enabled.isChecked():
+                    budget.enable()
+                else:
+                    budget.disable()
+                self.was_enabled[name] = enabled.isChecked()
+        self.budgetsApplied.emit()
 
     def cancelClicked(self):
         self.reject()
\ No newline at end of file
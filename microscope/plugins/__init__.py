@@ -1,17 +1,138 @@
-from inspect import isclass
-from pkgutil import iter_modules
-from pathlib import Path
+""" Registry of the Microscope widget's plugins.
+
+Plugins are declared up front with a PluginSpec, their modules are only
+imported when a plugin is first created or its class is asked for, so
+importing this package does not pull in what the plugins depend on, cv2 and
+numpy for Record. A spec can stand in for the plugin class wherever the
+widgets take one:
+
+    from microscope.plugins import plugin
+    Microscope(parent, plugins=[plugin('ZoomPlugin'), plugin('GridPlugin')])
+
+`from microscope.plugins import ZoomPlugin` still works and imports that one
+plugin's module. Other packages add plugins through the 'qmicroscope.plugins'
+entry point group, the entry point name is the plugin name and its value
+'module:Class'.
+"""
 from importlib import import_module
+from typing import Any, Dict, List, Optional, Tuple
+
+ENTRY_POINT_GROUP = 'qmicroscope.plugins'
+
+
+class PluginSpec:
+    """ What is known about a plugin without importing it.
+
+    target is where the class lives, 'module:Class' as in an entry point.
+    """
+    __slots__ = ('name', 'target', 'title', 'requires', '_cls')
+
+    def __init__(self, name: str, target: str, title: str = '',
+                 requires: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.target = target
+        self.title = title or name
+        # Modules beyond qtpy that loading the plugin imports.
+        self.requires = requires
+        self._cls: Optional[type] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._cls is not None
+
+    def load(self) -> type:
+        """ Import the plugin's module and return its class. """
+        if self._cls is None:
+            module, _, attribute = self.target.partition(':')
+            self._cls = getattr(import_module(module.strip()), attribute.strip() or self.name)
+        return self._cls
+
+    def __call__(self, parent: Any) -> Any:
+        return self.load()(parent)
+
+    def __repr__(self) -> str:
+        return f'PluginSpec({self.name!r}, {self.target!r})'
+
+
+PLUGINS: Dict[str, PluginSpec] = {}
+
+
+def register_plugin(spec: PluginSpec) -> PluginSpec:
+    PLUGINS[spec.name] = spec
+    return spec
+
+
+for _spec in [
+    PluginSpec('ZoomPlugin', 'microscope.plugins.zoom_plugin:ZoomPlugin', 'Zoom'),
+    PluginSpec('GridPlugin', 'microscope.plugins.grid_plugin:GridPlugin', 'Grid'),
+    PluginSpec('CrossHairPlugin', 'microscope.plugins.crosshair_plugin:CrossHairPlugin',
+               'Crosshair'),
+    PluginSpec('ScalePlugin', 'microscope.plugins.scale_plugin:ScalePlugin', 'Scale'),
+    PluginSpec('PresetPlugin', 'microscope.plugins.preset_plugin:PresetPlugin',
+               'Camera Presets'),
+    PluginSpec('TogglePlugin', 'microscope.plugins.toggle_plugin:TogglePlugin',
+               'Toggle Plugin'),
+    PluginSpec('HistoryPlugin', 'microscope.plugins.history_plugin:HistoryPlugin', 'History'),
+    PluginSpec('RecordPlugin', 'microscope.plugins.record_plugin:RecordPlugin', 'Record',
+               ('cv2', 'numpy')),
+]:
+    register_plugin(_spec)
+
+# Not plugins themselves, but importable from here like them.
+_BASES = {
+    'BasePlugin': 'microscope.plugins.base_plugin',
+    'BaseImagePlugin': 'microscope.plugins.base_plugin',
+    'BaseFramePlugin': 'microscope.plugins.base_plugin',
+}
+
+_entry_points_loaded = False
+
+
+def _load_entry_points() -> None:
+    """ Register the plugins other packages declare, without importing them. """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return
+    try:
+        found = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python before 3.10 returns a dict of groups.
+        found = entry_points().get(ENTRY_POINT_GROUP, [])
+    for entry_point in found:
+        # Built in plugins win over an installed one of the same name.
+        if entry_point.name not in PLUGINS:
+            register_plugin(PluginSpec(entry_point.name, entry_point.value))
+
+
+def plugin(name: str) -> PluginSpec:
+    """ The spec of a plugin by its class name or entry point name. """
+    spec = PLUGINS.get(name)
+    if spec is None:
+        _load_entry_points()
+        spec = PLUGINS.get(name)
+    if spec is None:
+        raise KeyError(f'Unknown plugin: {name}')
+    return spec
+
+
+def available_plugins() -> List[str]:
+    """ Names of the built in and installed plugins. """
+    _load_entry_points()
+    return list(PLUGINS)
+
 
-# iterate through the modules in the current package
-package_dir = str(Path(__file__).resolve().parent)
-for (_, module_name, _) in iter_modules([package_dir]):
+def __getattr__(name: str) -> Any:
+    if name in _BASES:
+        return getattr(import_module(_BASES[name]), name)
+    if name in PLUGINS:
+        return PLUGINS[name].load()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-    # import the module and iterate through its attributes
-    module = import_module(f"{__name__}.{module_name}")
-    for attribute_name in dir(module):
-        attribute = getattr(module, attribute_name)
 
-        if isclass(attribute):
-            # Add the class to this package's variables
-            globals()[attribute_name] = attribute
\ No newline at end of file
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_BASES) + list(PLUGINS))
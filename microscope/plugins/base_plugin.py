@@ -1,14 +1,26 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from qtpy.QtGui import QMouseEvent, QImage
 from qtpy.QtCore import QSettings
 from qtpy.QtWidgets import QWidget, QGroupBox
+from microscope.widgets.frame import Frame
+from microscope.widgets.framebuffer import CHANNELS, array_to_image, image_to_array
 
 class BasePlugin(ABC):
+    """ A plugin of the Microscope widget.
+
+    Every hook runs on the GUI thread, except process() and process_frame()
+    of a BaseFramePlugin, which run in the camera's acquisition thread while
+    the GUI thread carries on. Those two must not touch widgets, the scene or
+    the parent Microscope, and should only read plain attributes that the GUI
+    side replaces whole, never updates in place. Anything they find goes back
+    to the GUI thread through the frame and show_result().
+    """
 
     def __init__(self, parent) -> None:
         self.name = 'Generic Plugin'
         self.updates_image = False
+        self.processes_frames = False
         self.parent = parent
     
     @abstractmethod
@@ -16,17 +28,40 @@ class BasePlugin(ABC):
         pass
 
     def update_image_data(self, image: QImage):
+        """ Process the image about to be shown, returning the result.
+
+        The Frame it came from, with its timestamps and full resolution size,
+        is self.parent.frame.
+        """
         return image
 
-    @abstractmethod
+    def needs_full_resolution(self) -> bool:
+        """ True if the plugin needs frames before they are downscaled. """
+        return False
+
+    def decode_crop(self) -> Optional[Tuple[int, int, int, int]]:
+        """ The only region of the frame the plugin shows, None for all of it.
+
+        x, y, width and height in full resolution pixels. If no plugin that
+        changes the image runs before this one, the camera source decodes just
+        that region and the frame's crop says so.
+        """
+        return None
+
+    def handles(self, hook: str) -> bool:
+        """ True if the plugin overrides that hook of BasePlugin.
+
+        The widget only calls a plugin's mouse hooks and update_image_data
+        if it does, plugins leave out the hooks they have no use for.
+        """
+        return getattr(type(self), hook) is not getattr(BasePlugin, hook)
+
     def mouse_press_event(self, event: QMouseEvent):
         pass
 
-    @abstractmethod
     def mouse_move_event(self, event: QMouseEvent):
         pass
 
-    @abstractmethod
     def mouse_release_event(self, event: QMouseEvent):
         pass
 
@@ -49,4 +84,45 @@ class BaseImagePlugin(BasePlugin):
     def __init__(self, parent) -> None:
         super().__init__(parent)
         self.name = 'Base Image Plugin'
-        self.updates_image = True
\ No newline at end of file
+        self.updates_image = True
+
+
+class BaseFramePlugin(BasePlugin):
+    """ A plugin that works on NumPy frames off the GUI thread.
+
+    process_frame() gets each frame the widget is sent, after the hub has
+    cropped and downscaled it, as a read only uint8 view of the image's own
+    pixels, laid out as listed in microscope.widgets.framebuffer. It may
+    return a new array to replace the pixels shown, which is used without a
+    copy so it must not be reused for the next frame, or any other result,
+    which is handed to show_result() on the GUI thread together with the
+    frame. The frame plugins run before the image plugins, in the order of
+    the plugin list.
+    """
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent)
+        self.name = 'Base Frame Plugin'
+        self.processes_frames = True
+
+    def process_frame(self, array: Any, frame: Frame) -> Any:
+        """ Analyse or change a frame, runs in the acquisition thread. """
+        return None
+
+    def show_result(self, result: Any) -> None:
+        """ Show what process_frame() returned, runs on the GUI thread. """
+        pass
+
+    def process(self, frame: Frame) -> None:
+        result = self.process_frame(image_to_array(frame.image), frame)
+        if result is None:
+            return
+        if hasattr(result, '__array_interface__'):
+            # Keep the layout of the source, RGB888 and BGR888 look alike.
+            shape = getattr(result, 'shape', ())
+            channels = 1 if len(shape) == 2 else shape[-1]
+            format = frame.image.format()
+            frame.image = array_to_image(
+                result, format if CHANNELS.get(format) == channels else None)
+        else:
+            frame.results[self] = result
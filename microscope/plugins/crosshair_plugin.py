@@ -1,5 +1,5 @@
 from microscope.plugins.base_plugin import BaseImagePlugin
-from qtpy.QtGui import QColor, QPen, QMouseEvent
+from qtpy.QtGui import QColor, QPen
 from qtpy.QtCore import QPoint, QLineF
 from qtpy.QtWidgets import (QGraphicsScene, QAction, QColorDialog, 
                             QGroupBox, QFormLayout, QSpinBox,
@@ -92,15 +92,6 @@ class CrossHairPlugin(BaseImagePlugin):
         self._color = QColorDialog.getColor()
         self._paint_crosshair(self.parent.scene)
 
-    def mouse_press_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_move_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_release_event(self, event: QMouseEvent):
-        pass
-
     def write_settings(self) -> Dict[str, Any]:
         settings = {}
         settings['color'] = self._color
@@ -155,4 +146,4 @@ class CrossHairPlugin(BaseImagePlugin):
         self._always_centered = self.always_centered_checkbox.isChecked()
         self._pos.setX(self.x_pos_widget.value())
         self._pos.setY(self.y_pos_widget.value())
-        self._paint_crosshair(self.parent.scene)
\ No newline at end of file
+        self._paint_crosshair(self.parent.scene)
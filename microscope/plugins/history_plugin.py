@@ -0,0 +1,52 @@
+import time
+from typing import Dict, Any, TYPE_CHECKING
+from qtpy.QtWidgets import QAction, QMenu, QFileDialog
+from microscope.plugins.base_plugin import BasePlugin
+if TYPE_CHECKING:
+    from microscope.microscope import Microscope
+
+class HistoryPlugin(BasePlugin):
+    """Rewind, step through and save the recent frames of the camera
+    """
+    def __init__(self, parent: "Microscope") -> None:
+        super().__init__(parent)
+        self.parent = parent
+        self.name = 'History'
+        self.save_seconds = 60
+
+    def context_menu_entry(self):
+        actions = []
+        history_menu = QMenu(title='History', parent=self.parent)
+        for label, seconds in [('Back 1 s', 1), ('Back 10 s', 10)]:
+            action = QAction(label, self.parent)
+            action.triggered.connect(lambda val, seconds=seconds: self.parent.rewind(seconds))
+            history_menu.addAction(action)
+        for label, frames in [('Previous frame', -1), ('Next frame', 1)]:
+            action = QAction(label, self.parent)
+            action.triggered.connect(lambda val, frames=frames: self.parent.step(frames))
+            history_menu.addAction(action)
+        actions.append(history_menu)
+
+        if self.parent.playback is not None:
+            live_action = QAction('Return to live', self.parent)
+            live_action.triggered.connect(self.parent.live)
+            actions.append(live_action)
+
+        save_action = QAction(f'Save last {self.save_seconds} s', self.parent)
+        save_action.triggered.connect(self._save)
+        actions.append(save_action)
+        return actions
+
+    def _save(self):
+        end = time.time()
+        filename, _ = QFileDialog.getSaveFileName(self.parent, 'Save history', 'history.mjpg',
+                                                  'MJPEG (*.mjpg)')
+        if filename:
+            count = self.parent.saveHistory(filename, end - self.save_seconds, end)
+            print(f'Saved {count} frames to {filename}')
+
+    def read_settings(self, settings: Dict[str, Any]):
+        self.save_seconds = int(settings.get('save_seconds', self.save_seconds))
+
+    def write_settings(self) -> Dict[str, Any]:
+        return {'save_seconds': self.save_seconds}
@@ -1,7 +1,6 @@
 from typing import Optional, Dict, Any, TYPE_CHECKING
 from qtpy.QtWidgets import QAction, QMenu, QInputDialog
 from microscope.plugins.base_plugin import BasePlugin
-from qtpy.QtGui import QMouseEvent
 if TYPE_CHECKING:
     from microscope.microscope import Microscope
 
@@ -60,13 +59,3 @@ class PresetPlugin(BasePlugin):
         for plugin in self.parent.plugins:
             if plugin != self and plugin.name in preset_values:
                 plugin.read_settings(preset_values[plugin.name])
-    
-
-    def mouse_move_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_press_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_release_event(self, event: QMouseEvent):
-        pass
\ No newline at end of file
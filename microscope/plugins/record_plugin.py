@@ -1,10 +1,10 @@
-from typing import Dict, Any, TYPE_CHECKING
+import time
+from typing import Dict, Any, Optional, TYPE_CHECKING
 from qtpy.QtWidgets import QAction
 from qtpy.QtGui import QImage
 from microscope.plugins.base_plugin import BaseImagePlugin
-from qtpy.QtGui import QMouseEvent
+from microscope.widgets.framebuffer import image_to_array
 import cv2 as cv
-import numpy as np
 if TYPE_CHECKING:
     from microscope.microscope import Microscope
 
@@ -15,34 +15,64 @@ class RecordPlugin(BaseImagePlugin):
         self.name = 'Record'
         self.fourcc = cv.VideoWriter_fourcc(*'MJPG')
         self.filename = '/nsls2/data/mx/video_test/output.mjpg'
+        self.fps = 5.0
         self.recording = False
+        self.out = None
+        self.size = (0, 0)
+        self.started = 0.0
+        self.written = 0
+        # The frame in the video until the next one, and how far the camera's
+        # capture times are behind this machine's clock.
+        self.last: Optional[QImage] = None
+        self.offset = 0.0
     
     def qimage_to_mat(self, incomingImage):
-        '''  Converts a QImage into an opencv MAT format  '''
+        '''  Converts a QImage into the BGR mat the video writer takes  '''
 
-        incomingImage = incomingImage.convertToFormat(QImage.Format.Format_RGB32)
-
-        width = incomingImage.width()
-        height = incomingImage.height()
-
-        ptr = incomingImage.bits()
-        ptr.setsize(height * width * 4)
-        arr = np.frombuffer(ptr, np.uint8).reshape((height, width, 4))
+        # A view of the image's pixels, BGR888 frames from OpenCV need
+        # nothing more, the others one conversion straight to BGR.
+        arr = image_to_array(incomingImage)
+        if arr.ndim == 2:
+            return cv.cvtColor(arr, cv.COLOR_GRAY2BGR)
+        if arr.shape[2] == 4:
+            return cv.cvtColor(arr, cv.COLOR_BGRA2BGR)
+        if incomingImage.format() == QImage.Format_RGB888:
+            return cv.cvtColor(arr, cv.COLOR_RGB2BGR)
         return arr
     
     def update_image_data(self, image: QImage):
-        if self.recording and image:
-            self.out.write(self.qimage_to_mat(image))
+        frame = self.parent.frame
+        # Error frames have no data and are not part of the recording.
+        if self.recording and image and frame is not None and frame.data:
+            if self.out is None:
+                self.size = (image.width(), image.height())
+                self.out = cv.VideoWriter(self.filename, self.fourcc, self.fps, self.size)
+                self.started = frame.captured
+                self.written = 0
+            self.offset = frame.received - frame.captured
+            # Repeat frames so the video plays back at the pace they were
+            # captured, the previous frame fills the slots up to this one's.
+            slot = int((frame.captured - self.started) * self.fps)
+            self.write_last(slot)
+            # QImage copies on write, so later plugins cannot change it.
+            self.last = image
+            self.write_last(slot + 1)
         return image
 
-    def mouse_move_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_press_event(self, event: QMouseEvent):
-        pass
+    def write_last(self, until: int) -> None:
+        """ Write the last frame into the video slots before until. """
+        if self.last is None or self.written >= until:
+            return
+        mat = self.qimage_to_mat(self.last)
+        # The writer silently drops frames of any other size.
+        if (mat.shape[1], mat.shape[0]) != self.size:
+            mat = cv.resize(mat, self.size, interpolation=cv.INTER_AREA)
+        while self.written < until:
+            self.out.write(mat)
+            self.written += 1
 
-    def mouse_release_event(self, event: QMouseEvent):
-        pass
+    def needs_full_resolution(self) -> bool:
+        return self.recording
 
     def context_menu_entry(self):
         actions = []
@@ -54,14 +84,18 @@ class RecordPlugin(BaseImagePlugin):
 
     def _record(self):
         self.recording = not self.recording
-        if self.recording:
-            self.out = cv.VideoWriter(self.filename, self.fourcc, 5.0, (1280,720))
-        else:
+        self.parent.refresh()
+        if not self.recording and self.out is not None:
+            # The last frame stays on until recording stopped.
+            stopped = time.time() - self.offset
+            self.write_last(int((stopped - self.started) * self.fps) + 1)
+            self.last = None
             self.out.release()
+            self.out = None
 
 
     def read_settings(self, settings: Dict[str, Any]):
         pass
 
     def write_settings(self) -> Dict[str, Any]:
-        return {}
\ No newline at end of file
+        return {}
@@ -1,5 +1,5 @@
 from microscope.plugins.base_plugin import BaseImagePlugin
-from qtpy.QtGui import QColor, QPen, QMouseEvent, QFont, QBrush
+from qtpy.QtGui import QColor, QPen, QFont, QBrush
 from qtpy.QtCore import QPoint, QLineF
 from qtpy.QtWidgets import (QGraphicsScene, QAction, QColorDialog, 
                             QGroupBox, QFormLayout, QSpinBox,
@@ -87,15 +87,6 @@ class ScalePlugin(BaseImagePlugin):
         actions.append(visible_action)
         return actions
 
-    def mouse_press_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_move_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_release_event(self, event: QMouseEvent):
-        pass
-
     def read_settings(self, settings: Dict[str, Any]):
         self._color = settings.get('color', self._color)
         self._pos = settings.get('pos', self._pos)
@@ -164,4 +155,4 @@ class ScalePlugin(BaseImagePlugin):
         self._pos.setY(self.y_pos_widget.value())
         self._hor_line_measure = self.hor_measure_setting_widget.text()
         self._vert_line_measure = self.vert_measure_setting_widget.text()
-        self._paint_scale(self.parent.scene)
\ No newline at end of file
+        self._paint_scale(self.parent.scene)
@@ -1,7 +1,6 @@
 from typing import Optional, Dict, Any, TYPE_CHECKING
 from qtpy.QtWidgets import QCheckBox
 from microscope.plugins.base_plugin import BasePlugin
-from qtpy.QtGui import QMouseEvent
 if TYPE_CHECKING:
     from microscope.microscope import Microscope
 
@@ -20,15 +19,6 @@ class TogglePlugin(BasePlugin):
     def _toggle_cam(self, state):
         self.parent.acquire(state)
 
-    def mouse_move_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_press_event(self, event: QMouseEvent):
-        pass
-
-    def mouse_release_event(self, event: QMouseEvent):
-        pass
-
     def context_menu_entry(self):
         return []
 
@@ -36,4 +26,4 @@ class TogglePlugin(BasePlugin):
         pass
 
     def write_settings(self) -> Dict[str, Any]:
-        return {}
\ No newline at end of file
+        return {}
@@ -1,7 +1,7 @@
 from qtpy.QtWidgets import QAction, QWidget
 from qtpy.QtCore import QRect, Qt
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from microscope.widgets.rubberband import ResizableRubberBand
 from microscope.plugins.base_plugin import BaseImagePlugin
@@ -18,15 +18,26 @@ class ZoomPlugin(BaseImagePlugin):
 
     def _crop_image(self) -> None:
         if self.zoomRubberBand:
-            width_scaling_factor = self.org_image_wd/self.parent.image.width()
-            ht_scaling_factor = self.org_image_ht/self.parent.image.height()
+            # The selection is on what is shown, either the current crop or
+            # the whole frame, the crop is kept in full resolution pixels.
+            if self.crop:
+                org_x, org_y, org_wd, org_ht = self.crop.getRect()
+            else:
+                org_x, org_y = 0, 0
+                org_wd, org_ht = self.parent.frame.size if self.parent.frame else (0, 0)
+                if not org_wd or not org_ht:
+                    org_wd, org_ht = self.org_image_wd, self.org_image_ht
+            shown = self.parent.displaySize()
+            width_scaling_factor = org_wd/shown.width()
+            ht_scaling_factor = org_ht/shown.height()
             
             rect_x, rect_y, rect_width, rect_ht = self.zoomRubberBand.geometry().getRect()
-            x = int(rect_x*width_scaling_factor)
-            y = int(rect_y*ht_scaling_factor)
-            wd = int(rect_width*width_scaling_factor)
-            ht = int(rect_ht*ht_scaling_factor)  
+            x = org_x + int(rect_x*width_scaling_factor)
+            y = org_y + int(rect_y*ht_scaling_factor)
+            wd = max(1, int(rect_width*width_scaling_factor))
+            ht = max(1, int(rect_ht*ht_scaling_factor))
             self.crop = QRect(x,y,wd,ht)
+            self.parent.refresh()
             self.zoomRubberBand.hide()
             #self.zoomRubberBand.destroy()
             self.zoomRubberBand = None
@@ -67,14 +78,29 @@ class ZoomPlugin(BaseImagePlugin):
         self.org_image_ht = image.height()
         self.org_image_wd = image.width()
         if self.crop:
-            image = image.copy(self.crop)
+            crop = self.crop.getRect()
+            frame = self.parent.frame
+            if frame is None:
+                image = image.copy(self.crop)
+            elif frame.crop != crop:
+                image = frame.cropped(crop, image)
         return image
 
+    def needs_full_resolution(self) -> bool:
+        # The crop is defined in full resolution pixels.
+        return self.crop is not None
+
+    def decode_crop(self) -> Optional[Tuple[int, int, int, int]]:
+        return self.crop.getRect() if self.crop else None
+
     def _reset_crop(self) -> None:
         self.crop = None
+        self.parent.refresh()
 
     def read_settings(self, settings: Dict[str, Any]):
         self.crop = settings.get('crop', None)
+        if self.parent:
+            self.parent.refresh()
         
 
     def write_settings(self) -> Dict[str, Any]:
@@ -38,6 +38,10 @@ class Settings(QDialog):
         self.fps = QSpinBox()
         self.fps.setRange(1, 30)
         self.fps.setValue(5)
+        self.hiddenFps = QSpinBox()
+        self.hiddenFps.setRange(0, 30)
+        self.hiddenFps.setValue(1)
+        self.hiddenFps.setSpecialValueText('Pause')
         self.xDivs = QSpinBox()
         self.xDivs.setRange(1, 50)
         self.xDivs.setValue(5)
@@ -45,6 +49,13 @@ class Settings(QDialog):
         self.yDivs.setRange(1, 50)
         self.yDivs.setValue(5)
         self.color = QCheckBox()
+        self.adaptive = QCheckBox()
+        self.backend = QComboBox()
+        self.backend.addItem('Thread per camera', 'thread')
+        self.backend.addItem('Shared asyncio engine', 'asyncio')
+        self.scaleMode = QComboBox()
+        self.scaleMode.addItem('In the acquisition thread', 'worker')
+        self.scaleMode.addItem('View transform', 'view')
         #self.container = None
         #self.microscope: "Microscope|None" = None
 
@@ -63,9 +74,13 @@ class Settings(QDialog):
         formLayout.addRow('Camera URL:', self.url)
         formLayout.addRow('Image Scale:', self.scale)
         formLayout.addRow('Frame Rate:', self.fps)
+        formLayout.addRow('Adaptive rate:', self.adaptive)
+        formLayout.addRow('Rate when hidden:', self.hiddenFps)
         formLayout.addRow('X Divisions:', self.xDivs)
         formLayout.addRow('Y Divisions:', self.yDivs)
         formLayout.addRow('Color boxes:', self.color)
+        formLayout.addRow('Acquisition:', self.backend)
+        formLayout.addRow('Scaling:', self.scaleMode)
 
         # Create layout and add widgets
         layout = QVBoxLayout()
@@ -143,9 +158,13 @@ class Settings(QDialog):
             return 
         self.microscope.url = self.url.text()
         self.microscope.fps = self.fps.value()
+        self.microscope.adaptive = self.adaptive.isChecked()
+        self.microscope.hiddenFps = self.hiddenFps.value()
         self.microscope.xDivs = self.xDivs.value()
         self.microscope.yDivs = self.yDivs.value()
         self.microscope.color = self.color.isChecked()
+        self.microscope.backend = self.backend.currentData()
+        self.microscope.scaleMode = self.scaleMode.currentData()
         self.microscope.scale = [ self.scale.value(), 0 ]
         self.microscope.update()
 
@@ -154,9 +173,13 @@ class Settings(QDialog):
             return
         self.url.setText(self.microscope.url)
         self.fps.setValue(self.microscope.fps)
+        self.adaptive.setChecked(self.microscope.adaptive)
+        self.hiddenFps.setValue(int(self.microscope.hiddenFps))
         self.xDivs.setValue(self.microscope.xDivs)
         self.yDivs.setValue(self.microscope.yDivs)
         self.color.setChecked(self.microscope.color)
+        self.backend.setCurrentIndex(max(self.backend.findData(self.microscope.backend), 0))
+        self.scaleMode.setCurrentIndex(max(self.scaleMode.findData(self.microscope.scaleMode), 0))
         if len(self.microscope.scale) > 0:
             self.scale.setValue(self.microscope.scale[0])
 
@@ -0,0 +1,266 @@
+""" A simulated network camera for testing without hardware.
+
+Serves single JPEG snapshots and multipart MJPEG streams on the paths the
+real cameras use, so the defaults in the widgets work against it:
+
+    python -m microscope.simcam --port 9998 --size 1280x720 --fps 30
+
+Snapshots are at /jpg/image.jpg and /output.jpg, streams at /mjpg/video.mjpg
+and /video.mjpg. With --cameras N, N independent cameras are served on
+consecutive ports starting at --port.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+from qtpy.QtCore import QBuffer, QByteArray, QCoreApplication, QIODevice, QRect, Qt
+from qtpy.QtGui import QColor, QFont, QGuiApplication, QImage, QPainter
+
+SNAPSHOT_PATHS = ('/jpg/image.jpg', '/output.jpg', '/image.jpg')
+STREAM_PATHS = ('/mjpg/video.mjpg', '/video.mjpg', '/stream.mjpg')
+BOUNDARY = 'frame'
+
+
+class SimulatedCamera:
+    """ Renders the frames of one simulated camera.
+
+    The frame number follows the wall clock at the configured rate, a frame is
+    only rendered and encoded when a client first asks for it, and shared by
+    every client after that. Each frame has the counter, the camera name and
+    the time burned in, over a moving pattern so consecutive frames differ.
+    The capture time is sent in an X-Timestamp header.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 10.0,
+                 quality: int = 80, latency: float = 0.0, jitter: float = 0.0,
+                 dropout: float = 0.0, name: str = 'sim') -> None:
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.quality = quality
+        self.latency = latency
+        self.jitter = jitter
+        self.dropout = dropout
+        self.name = name
+        self.start = time.monotonic()
+        self.served = 0
+        self.dropped = 0
+        self._index = -1
+        self._data = b''
+        self._captured = 0.0
+        self._lock = threading.Lock()
+
+    def index(self) -> int:
+        return int((time.monotonic() - self.start) * self.fps)
+
+    def frame(self) -> Tuple[int, bytes, float]:
+        """ The current frame number, its JPEG data and when it was captured. """
+        index = self.index()
+        with self._lock:
+            if index != self._index:
+                self._captured = time.time()
+                self._data = self.render(index)
+                self._index = index
+            return self._index, self._data, self._captured
+
+    def wait(self, index: int) -> None:
+        """ Sleep until the frame after index is due. """
+        delay = self.start + (index + 1) / self.fps - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def delay(self) -> None:
+        """ Sleep for the injected latency plus a random jitter. """
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def drop(self) -> bool:
+        if self.dropout and random.random() < self.dropout:
+            self.dropped += 1
+            return True
+        return False
+
+    def render(self, index: int) -> bytes:
+        image = QImage(self.width, self.height, QImage.Format_RGB32)
+        image.fill(QColor(30, 30, 40))
+        painter = QPainter(image)
+        hue = (index * 3) % 360
+        band = max(1, self.width // 8)
+        x = (index * 7) % (self.width + band) - band
+        painter.fillRect(QRect(x, 0, band, self.height), QColor.fromHsv(hue, 160, 200))
+        painter.fillRect(QRect(0, (index * 5) % self.height, self.width, 4), Qt.white)
+        painter.setPen(Qt.white)
+        font = QFont()
+        font.setPixelSize(max(12, self.height // 8))
+        painter.setFont(font)
+        painter.drawText(image.rect(), Qt.AlignCenter, f'{index}')
+        font.setPixelSize(max(10, self.height // 24))
+        painter.setFont(font)
+        painter.drawText(image.rect().adjusted(8, 8, -8, -8), Qt.AlignLeft | Qt.AlignTop,
+                         f'{self.name} {self.width}x{self.height} @ {self.fps:g} fps')
+        painter.drawText(image.rect().adjusted(8, 8, -8, -8), Qt.AlignLeft | Qt.AlignBottom,
+                         time.strftime('%H:%M:%S') + f'.{int(time.time() * 1000) % 1000:03d}')
+        painter.end()
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        image.save(buffer, 'JPG', self.quality)
+        return bytes(data)
+
+
+class CameraRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path in SNAPSHOT_PATHS:
+            self.snapshot()
+        elif path in STREAM_PATHS:
+            self.stream()
+        else:
+            self.send_error(404)
+
+    def snapshot(self):
+        camera = self.server.camera
+        camera.delay()
+        if camera.drop():
+            # Hang up without an answer, as a camera dropping off the network.
+            self.close_connection = True
+            return
+        index, data, captured = camera.frame()
+        etag = f'"{camera.name}-{index}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('ETag', etag)
+        self.send_header('X-Timestamp', f'{captured:.6f}')
+        self.end_headers()
+        self.wfile.write(data)
+        camera.served += 1
+
+    def stream(self):
+        camera = self.server.camera
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        last = -1
+        try:
+            while not self.server.stopping:
+                camera.wait(last)
+                camera.delay()
+                if camera.drop():
+                    return
+                last, data, captured = camera.frame()
+                self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                 f'Content-Length: {len(data)}\r\n'
+                                 f'X-Frame: {last}\r\n'
+                                 f'X-Timestamp: {captured:.6f}\r\n\r\n'.encode('latin-1'))
+                self.wfile.write(data)
+                self.wfile.write(b'\r\n')
+                camera.served += 1
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class CameraServer(ThreadingHTTPServer):
+    """ HTTP server for one simulated camera. """
+    daemon_threads = True
+
+    def __init__(self, camera: SimulatedCamera, host: str = 'localhost', port: int = 9998,
+                 verbose: bool = False) -> None:
+        super().__init__((host, port), CameraRequestHandler)
+        self.camera = camera
+        self.verbose = verbose
+        self.stopping = False
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def url(self, stream: bool = False) -> str:
+        path = STREAM_PATHS[0] if stream else SNAPSHOT_PATHS[0]
+        return f'http://{self.server_address[0]}:{self.port}{path}'
+
+    def stop(self) -> None:
+        self.stopping = True
+        self.shutdown()
+        self.server_close()
+
+
+def start_server(camera: SimulatedCamera, host: str = 'localhost', port: int = 0,
+                 verbose: bool = False) -> CameraServer:
+    """ Serve a camera from a background thread, port 0 picks a free port.
+
+    A QGuiApplication must exist to render the frames.
+    """
+    server = CameraServer(camera, host, port, verbose)
+    thread = threading.Thread(target=server.serve_forever, name=f'simcam-{server.port}',
+                              daemon=True)
+    thread.start()
+    return server
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Simulated snapshot and MJPEG camera.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9998)
+    parser.add_argument('--cameras', type=int, default=1,
+                        help='number of cameras, on consecutive ports')
+    parser.add_argument('--size', type=parse_size, default=(640, 480), help='WIDTHxHEIGHT')
+    parser.add_argument('--fps', type=float, default=10.0)
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality, 0-100')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added before every frame')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random extra latency of up to this many seconds')
+    parser.add_argument('--dropout', type=float, default=0.0,
+                        help='probability a request or stream is dropped per frame')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QCoreApplication.instance() or QGuiApplication(sys.argv)
+
+    servers = []
+    for i in range(args.cameras):
+        camera = SimulatedCamera(*args.size, fps=args.fps, quality=args.quality,
+                                 latency=args.latency, jitter=args.jitter,
+                                 dropout=args.dropout, name=f'cam{i}')
+        server = start_server(camera, args.host, args.port + i, args.verbose)
+        servers.append(server)
+        print(f'{camera.name}: {server.url()} {server.url(stream=True)}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    for server in servers:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
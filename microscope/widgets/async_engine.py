@@ -0,0 +1,293 @@
+import asyncio
+import os
+import threading
+import time
+import concurrent.futures
+from typing import AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from qtpy.QtCore import QObject, Signal
+from .backoff import Backoff
+from .downloader import FrameSource, is_mjpeg_url
+from .frame import Frame
+from .history import FrameHistory
+from .mjpeg import MjpegParser, boundary_from_content_type
+from .scheduler import FrameScheduler
+from .timing import StageTimings
+
+
+class HttpError(Exception):
+    pass
+
+
+async def read_response_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    """ Read the status line and headers, header names are lower cased. """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        status = int(lines[0].split()[1])
+    except (IndexError, ValueError):
+        raise HttpError(f'Bad status line: {lines[0]}')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def iter_body(reader: asyncio.StreamReader, headers: Dict[str, str],
+                    chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """ Yield the response body, handling chunked and length delimited bodies. """
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                await reader.readuntil(b'\r\n')
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif 'content-length' in headers:
+        yield await reader.readexactly(int(headers['content-length']))
+    else:
+        chunk = await reader.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = await reader.read(chunk_size)
+
+
+class AsyncEngine:
+    """ A single asyncio event loop driving every AsyncSource.
+
+    Sockets are serviced from one thread, decoding is handed to a small
+    bounded pool of worker threads.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix='decode')
+        self.thread = threading.Thread(target=self._run, name='acquisition', daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_engine: Optional[AsyncEngine] = None
+
+
+def engine() -> AsyncEngine:
+    """ The process wide engine, started on first use. """
+    global _engine
+    if _engine is None:
+        _engine = AsyncEngine()
+    return _engine
+
+
+class AsyncSource(FrameSource, QObject):
+    """ Camera source driven by the shared asyncio engine.
+
+    It offers the same interface the camera hub uses on a VideoThread, but
+    does not need a thread of its own. Only one decode per source is in flight
+    at a time, frames arriving while it is busy are dropped.
+    """
+    finished = Signal()
+
+    def __init__(self, fps: int = 5, url: str = '', timeout: float = 2.0,
+                 read_timeout: float = 5.0) -> None:
+        super().__init__()
+        self.url = url
+        self.fps = fps
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.backoff = Backoff()
+        self.history = FrameHistory()
+        self.timings = StageTimings(url)
+        self.isMjpegFeed = is_mjpeg_url(url)
+        self.scheduler = FrameScheduler(fps)
+        self.acquire = False
+        self.decoding = False
+        self._resume: Optional[asyncio.Event] = None
+        self._future: Optional[concurrent.futures.Future] = None
+        self._done = threading.Event()
+        self._done.set()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    def setUrl(self, url: str) -> None:
+        self.url = url
+        self.timings.name = url
+        self.isMjpegFeed = is_mjpeg_url(url)
+
+    def setFPS(self, fps: int) -> None:
+        self.fps = fps
+        self.scheduler.fps = fps
+
+    def setPaused(self, paused: bool) -> None:
+        """ Stop fetching without ending the coroutine, resuming is immediate. """
+        self.paused = paused
+        resume = self._resume
+        if not paused and resume is not None:
+            engine().loop.call_soon_threadsafe(resume.set)
+
+    def start(self) -> None:
+        if self.isRunning():
+            return
+        self.acquire = True
+        self.scheduler.reset()
+        self._done.clear()
+        self._future = engine().submit(self._run())
+        self._future.add_done_callback(self._finished)
+
+    def stop(self) -> None:
+        self.acquire = False
+        if self._future:
+            self._future.cancel()
+
+    def isRunning(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def wait(self, msecs: int) -> bool:
+        return self._done.wait(msecs / 1000)
+
+    def _finished(self, future) -> None:
+        self._done.set()
+        self.finished.emit()
+
+    async def _connect(self) -> None:
+        parts = urlsplit(self.url)
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, port, ssl=secure or None),
+            self.timeout)
+
+    def _close(self) -> None:
+        if self._writer:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def _request(self, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str]]:
+        parts = urlsplit(self.url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        reused = self._writer is not None
+        if not reused:
+            await self._connect()
+        extra = ''.join(f'{key}: {value}\r\n' for key, value in (headers or {}).items())
+        request = (f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                   f'Connection: keep-alive\r\n{extra}\r\n').encode('latin-1')
+        try:
+            self._writer.write(request)
+            await self._writer.drain()
+            return await asyncio.wait_for(read_response_head(self._reader), self.timeout)
+        except (OSError, asyncio.IncompleteReadError):
+            self._close()
+            # The camera may have closed an idle keep-alive connection.
+            if reused:
+                return await self._request(headers)
+            raise
+
+    async def _poll(self) -> None:
+        """ Fetch single JPEG snapshots on the scheduler's deadlines. """
+        while self.acquire and not self.paused:
+            began = time.perf_counter()
+            status, headers = await self._request(self.conditionalHeaders())
+            body = b''
+            if status != 304:
+                # A camera stalling mid body must fail the fetch, not hang it.
+                body = await asyncio.wait_for(self._readBody(headers), self.read_timeout)
+            self.timings.record('fetch', began, time.perf_counter())
+            if headers.get('connection', '').lower() == 'close':
+                self._close()
+            if status not in (200, 304):
+                raise HttpError(f'HTTP {status}')
+            self.connected()
+            if status == 304:
+                self.notModified()
+            else:
+                frame = self.frameChanged(body, {'ETag': headers.get('etag'),
+                                                 'Last-Modified': headers.get('last-modified'),
+                                                 'X-Timestamp': headers.get('x-timestamp')})
+                if frame:
+                    self._decode(frame)
+            await asyncio.sleep(self.scheduler.next_delay())
+
+    async def _readBody(self, headers: Dict[str, str]) -> bytes:
+        return b''.join([chunk async for chunk in iter_body(self._reader, headers)])
+
+    async def _stream(self) -> None:
+        """ Follow an MJPEG stream, decoding only the parts that are due. """
+        status, headers = await self._request()
+        if status != 200:
+            raise HttpError(f'HTTP {status}')
+        boundary = boundary_from_content_type(headers.get('content-type', ''))
+        if not boundary:
+            raise HttpError('Not a multipart stream')
+        parser = MjpegParser(boundary)
+        body = iter_body(self._reader, headers)
+        began = time.perf_counter()
+        while self.acquire and not self.paused:
+            chunk = await asyncio.wait_for(body.__anext__(), self.read_timeout)
+            parser.feed(chunk)
+            part = parser.next_part()
+            while part is not None:
+                # Fetch time of a part is the wait since the previous one.
+                now = time.perf_counter()
+                self.timings.record('fetch', began, now)
+                began = now
+                self.connected()
+                if self.scheduler.ready():
+                    frame = self.frameChanged(part.data, part.headers)
+                    if frame:
+                        self._decode(frame)
+                part = parser.next_part()
+
+    def _decode(self, frame: Frame) -> None:
+        if self.decoding:
+            self.scheduler.dropped += 1
+            # Never decoded, so an identical next frame must not be skipped.
+            self.invalidate()
+            return
+        self.decoding = True
+        future = asyncio.get_running_loop().run_in_executor(
+            engine().executor, self._decodeAndPublish, frame)
+        future.add_done_callback(self._decoded)
+
+    def _decoded(self, future) -> None:
+        self.decoding = False
+
+    def _decodeAndPublish(self, frame: Frame) -> None:
+        self.publish(self.decode(frame))
+
+    async def _run(self) -> None:
+        self.backoff.reset()
+        try:
+            while self.acquire:
+                if self.paused:
+                    self._close()
+                    self._resume = asyncio.Event()
+                    # Checked again in case it was resumed before the event existed.
+                    if self.paused:
+                        await self._resume.wait()
+                    self._resume = None
+                    self.scheduler.reset()
+                    continue
+                try:
+                    if self.isMjpegFeed:
+                        await self._stream()
+                    else:
+                        await self._poll()
+                except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, StopAsyncIteration, HttpError, ValueError):
+                    self._close()
+                    await asyncio.sleep(self.failed())
+        finally:
+            self._close()
@@ -0,0 +1,56 @@
+import random
+import time
+
+
+class Backoff:
+    """ Connection state of a camera source.
+
+    After a failure the source waits before reconnecting, the wait doubles
+    with every consecutive failure up to a maximum and is jittered so a wall
+    of cameras behind one dead switch does not reconnect in lock step. After
+    threshold failures in a row the circuit opens: the camera is reported as
+    offline and only probed once per cooldown until it answers again.
+    """
+    CONNECTED = 'connected'
+    BACKOFF = 'backoff'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, initial: float = 0.5, maximum: float = 30.0, threshold: int = 6,
+                 cooldown: float = 60.0, jitter: float = 0.5) -> None:
+        self.initial = initial
+        self.maximum = maximum
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = self.CONNECTED
+        self.failures = 0
+        self.retryAt = 0.0
+
+    def succeeded(self) -> None:
+        self.reset()
+
+    def failed(self) -> float:
+        """ Record a failure, returning the seconds to wait before retrying. """
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.state = self.OPEN
+            delay = self.cooldown
+        else:
+            self.state = self.BACKOFF
+            delay = min(self.maximum, self.initial * 2 ** (self.failures - 1))
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.retryAt = time.monotonic() + delay
+        return delay
+
+    def remaining(self) -> float:
+        """ Seconds until the next attempt is allowed, zero if it is now. """
+        remaining = self.retryAt - time.monotonic()
+        if remaining > 0:
+            return remaining
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+        return 0.0
@@ -0,0 +1,104 @@
+import math
+from typing import Any, Dict
+from .rate_control import ewma
+from .timing import Histogram
+
+
+class PluginBudget:
+    """ Rolling cost of one plugin's hooks and the limit it is held to.
+
+    update_image_data calls are timed into cost, a moving average, and a
+    histogram, mouse hook calls into their own so cheap mouse moves do not
+    water down the per frame cost. With a budget, in seconds, a plugin whose
+    update_image_data averages more than that either runs on every Nth frame
+    only, N picked so its share per frame fits the budget again and lowered
+    as it gets cheaper, or is disabled until re-enabled by hand. A disabled
+    plugin gets no hook calls at all. Nothing is enforced before WARMUP
+    calls. disabledBy tells a plugin disabled for its cost, 'budget', from
+    one turned off by the user, 'user'.
+    """
+    WARMUP = 10
+    MAX_EVERY = 30
+    POLICIES = ('throttle', 'disable')
+
+    def __init__(self, name: str, budget: float = 0.0, policy: str = 'throttle') -> None:
+        self.name = name
+        self.budget = budget
+        self.policy = policy
+        self.cost = 0.0
+        self.calls = 0
+        self.skipped = 0
+        self.every = 1
+        self.disabledBy = ''
+        self.histogram = Histogram()
+        self.eventCost = 0.0
+        self.events = Histogram()
+        self._frames = 0
+
+    @property
+    def disabled(self) -> bool:
+        return bool(self.disabledBy)
+
+    def due(self) -> bool:
+        """ True if update_image_data should run on this frame. """
+        if self.disabled:
+            return False
+        self._frames += 1
+        if self._frames % self.every:
+            self.skipped += 1
+            return False
+        return True
+
+    def recordEvent(self, seconds: float) -> None:
+        """ Add the time of one mouse hook call, it is not held to the budget. """
+        self.eventCost = ewma(self.eventCost, seconds)
+        self.events.add(seconds)
+
+    def record(self, seconds: float) -> bool:
+        """ Add the time of one frame's call, True if that got the plugin disabled. """
+        self.cost = ewma(self.cost, seconds)
+        self.histogram.add(seconds)
+        self.calls += 1
+        if self.budget <= 0 or self.calls < self.WARMUP:
+            return False
+        if self.policy == 'disable':
+            if self.cost > self.budget and not self.disabled:
+                self.disabledBy = 'budget'
+                return True
+            return False
+        self.every = max(1, min(self.MAX_EVERY, math.ceil(self.cost / self.budget)))
+        return False
+
+    def disable(self) -> None:
+        """ Turned off by the user rather than for its cost. """
+        self.disabledBy = 'user'
+
+    def enable(self) -> None:
+        """ Run on every frame again and start measuring afresh. """
+        self.disabledBy = ''
+        self.every = 1
+        self.cost = 0.0
+        self.calls = 0
+        self._frames = 0
+
+    def warning(self) -> str:
+        return (f'{self.name} disabled, {self.cost * 1000:.1f} ms per call '
+                f'is over its {self.budget * 1000:.1f} ms budget')
+
+    def summary(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = self.histogram.summary()
+        stats.update({'cost': self.cost, 'budget': self.budget, 'policy': self.policy,
+                      'every': self.every, 'skipped': self.skipped,
+                      'disabled': self.disabledBy, 'events': self.events.summary()})
+        return stats
+
+    def settings(self) -> Dict[str, Any]:
+        return {'budget': self.budget, 'policy': self.policy}
+
+    def applySettings(self, settings: Dict[str, Any]) -> None:
+        self.budget = float(settings.get('budget', self.budget))
+        policy = settings.get('policy', self.policy)
+        self.policy = policy if policy in self.POLICIES else self.policy
+        if self.budget <= 0 or self.policy == 'disable':
+            # Nothing to throttle to any more, run on every frame again.
+            self.every = 1
@@ -0,0 +1,349 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Type
+from qtpy.QtCore import QBuffer, QByteArray, QIODevice, QRect, QSize
+from qtpy.QtGui import QImage, QImageReader
+from .framebuffer import array_to_image
+
+Size = Optional[Tuple[int, int]]
+# A region of the full resolution frame, x, y, width and height.
+Crop = Optional[Tuple[int, int, int, int]]
+
+
+def reduction(width: int, height: int, size: Size, limit: int = 8) -> int:
+    """ The largest power of two reduction, up to limit, still at least size. """
+    if not size:
+        return 1
+    factor = 1
+    while (factor * 2 <= limit and width // (factor * 2) >= size[0]
+           and height // (factor * 2) >= size[1]):
+        factor *= 2
+    return factor
+
+
+# Start of frame markers, all but DHT, JPG and DAC in C0-CF.
+SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """ Width and height from the JPEG frame header, without decoding. """
+    if data[:2] != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker in SOF_MARKERS:
+            return (int.from_bytes(data[i + 7:i + 9], 'big'),
+                    int.from_bytes(data[i + 5:i + 7], 'big'))
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+        else:
+            i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+    return None
+
+
+def clamp_crop(crop: Crop, width: int, height: int) -> Crop:
+    """ Limit a crop to the frame, None if nothing of it is left. """
+    if crop is None:
+        return None
+    x, y, w, h = crop
+    x = max(0, min(x, width))
+    y = max(0, min(y, height))
+    w = min(w, width - x)
+    h = min(h, height - y)
+    if w <= 0 or h <= 0:
+        return None
+    return x, y, w, h
+
+
+def crop_reduced(image: QImage, crop: Crop, width: int, height: int) -> QImage:
+    """ Cut a crop given in full resolution pixels out of a reduced decode. """
+    if crop is None:
+        return image
+    fx = image.width() / width
+    fy = image.height() / height
+    x, y, w, h = crop
+    return image.copy(QRect(int(x * fx), int(y * fy),
+                            max(1, round(w * fx)), max(1, round(h * fy))))
+
+
+class Decoder(ABC):
+    """ A JPEG decoding backend.
+
+    decode() returns a QImage, decoded at a reduced scale no smaller than size
+    when the backend can do that in the DCT domain. With a crop only that
+    region of the frame is returned, size then applies to the region, and
+    backends that can skip decoding the rest of the frame do so, those set
+    crops. The others decode the whole frame and cut the region out after.
+    """
+    name = 'base'
+    crops = False
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    @abstractmethod
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        pass
+
+
+class PilDecoder(Decoder):
+    """ Pillow, a crop still decodes the whole frame, at a reduced scale. """
+    name = 'pil'
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            from PIL import Image, ImageQt
+        except ImportError:
+            return False
+        if not getattr(ImageQt, 'qt_is_installed', True):
+            return False
+        # Pillow picks its own Qt binding, which may not be the one qtpy uses,
+        # and newer Pillow dropped Qt 5, so convert a pixel to find out.
+        try:
+            return isinstance(ImageQt.ImageQt(Image.new('RGB', (1, 1))), QImage)
+        except Exception:
+            return False
+
+    def __init__(self) -> None:
+        from io import BytesIO
+        from PIL import Image, ImageQt
+        self.BytesIO = BytesIO
+        self.Image = Image
+        self.ImageQt = ImageQt
+
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        img = self.Image.open(self.BytesIO(data))
+        width, height = img.size
+        crop = clamp_crop(crop, width, height)
+        if size:
+            if crop:
+                factor = reduction(crop[2], crop[3], size)
+                img.draft(img.mode, (width // factor, height // factor))
+            else:
+                img.draft(img.mode, size)
+        if crop:
+            # Cropping before the conversion keeps it to the region.
+            fx = img.size[0] / width
+            fy = img.size[1] / height
+            x, y, w, h = crop
+            img = img.crop((int(x * fx), int(y * fy),
+                            int(x * fx) + max(1, round(w * fx)), int(y * fy) + max(1, round(h * fy))))
+        return self.ImageQt.ImageQt(img)
+
+
+class OpenCvDecoder(Decoder):
+    """ OpenCV, a crop still decodes the whole frame, at a reduced scale. """
+    name = 'opencv'
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import cv2
+            import numpy
+        except ImportError:
+            return False
+        return hasattr(QImage, 'Format_BGR888')
+
+    def __init__(self) -> None:
+        import cv2
+        import numpy
+        self.cv2 = cv2
+        self.numpy = numpy
+        self.flags = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                      4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        buffer = self.numpy.frombuffer(data, self.numpy.uint8)
+        factor = 1
+        # Only the header is needed to pick the reduction.
+        full = jpeg_size(data)
+        if full:
+            crop = clamp_crop(crop, *full)
+            if size:
+                factor = reduction(*(crop[2:] if crop else full), size)
+        array = self.cv2.imdecode(buffer, self.flags[factor])
+        if array is None:
+            raise ValueError('Could not decode JPEG')
+        # The image keeps the array alive, no copy of the pixels is made.
+        image = array_to_image(array, QImage.Format_BGR888)
+        if full and crop:
+            return crop_reduced(image, crop, *full)
+        return image
+
+
+class TurboJpegDecoder(Decoder):
+    name = 'turbojpeg'
+    crops = True
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            from turbojpeg import TurboJPEG
+            TurboJPEG()
+        except Exception:
+            return False
+        return True
+
+    def __init__(self) -> None:
+        import turbojpeg
+        self.turbojpeg = turbojpeg
+        self.jpeg = turbojpeg.TurboJPEG()
+
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        width, height = self.jpeg.decode_header(data)[:2]
+        crop = clamp_crop(crop, width, height)
+        if crop and crop[2] * crop[3] * 2 < width * height and hasattr(self.jpeg, 'crop'):
+            # Lossless crop to whole MCUs first, only those blocks then go
+            # through the IDCT and colour conversion.
+            x, y, w, h = crop
+            ax, ay = x - x % 16, y - y % 16
+            aw, ah = min(width - ax, w + x - ax), min(height - ay, h + y - ay)
+            data = self.jpeg.crop(data, ax, ay, aw, ah)
+            width, height = aw, ah
+            crop = (x - ax, y - ay, w, h)
+        factor = 1
+        if size:
+            factor = reduction(*(crop[2:] if crop else (width, height)), size)
+        # BGRX bytes are the memory layout of Format_RGB32 on little endian.
+        array = self.jpeg.decode(data, pixel_format=self.turbojpeg.TJPF_BGRX,
+                                 scaling_factor=(1, factor))
+        image = array_to_image(array, QImage.Format_RGB32)
+        if crop and crop != (0, 0, width, height):
+            return crop_reduced(image, crop, width, height)
+        return image
+
+
+class QtDecoder(Decoder):
+    name = 'qt'
+    crops = True
+
+    @classmethod
+    def available(cls) -> bool:
+        return b'jpeg' in [bytes(f) for f in QImageReader.supportedImageFormats()]
+
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        # The reader does not own its device, keep the buffer until read.
+        buffer = _buffer(data)
+        reader = QImageReader(buffer, b'JPG')
+        full = reader.size()
+        crop = clamp_crop(crop, full.width(), full.height())
+        if crop:
+            # The Qt JPEG plugin skips the scanlines outside the clip rect.
+            reader.setClipRect(QRect(*crop))
+        elif size:
+            factor = reduction(full.width(), full.height(), size)
+            if factor > 1:
+                # The Qt JPEG plugin maps this onto libjpeg's scale_denom.
+                reader.setScaledSize(QSize(full.width() // factor, full.height() // factor))
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(reader.errorString())
+        return image
+
+
+def _buffer(data: bytes) -> QBuffer:
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    return buffer
+
+
+# Registered backends, in order of preference before any calibration.
+DECODERS: Dict[str, Type[Decoder]] = {}
+
+
+def register_decoder(cls: Type[Decoder]) -> Type[Decoder]:
+    DECODERS[cls.name] = cls
+    return cls
+
+
+for _cls in (TurboJpegDecoder, OpenCvDecoder, PilDecoder, QtDecoder):
+    register_decoder(_cls)
+
+
+def available_decoders() -> List[str]:
+    return [name for name, cls in DECODERS.items() if cls.available()]
+
+
+class DecoderChain:
+    """ Decodes with the first backend that works, falling back down the chain.
+
+    calibrate() times every backend on a real frame and moves the fastest to
+    the front, it is run once on the first frame decoded. That is a full
+    frame decode, so a crop goes to the fastest backend that crops first.
+    """
+
+    def __init__(self, names: Optional[List[str]] = None) -> None:
+        names = names or available_decoders()
+        self.decoders: List[Decoder] = [DECODERS[name]() for name in names]
+        self.calibrated = False
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.decoders[0].name if self.decoders else ''
+
+    def calibrate(self, data: bytes, repeat: int = 3) -> Dict[str, float]:
+        timings = {}
+        for decoder in self.decoders:
+            try:
+                decoder.decode(data)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    decoder.decode(data)
+                timings[decoder.name] = (time.perf_counter() - start) / repeat
+            except Exception:
+                timings[decoder.name] = float('inf')
+        self.decoders.sort(key=lambda d: timings[d.name])
+        self.calibrated = True
+        return timings
+
+    def decode(self, data: bytes, size: Size = None, crop: Crop = None) -> QImage:
+        if not self.calibrated:
+            with self._lock:
+                if not self.calibrated:
+                    self.calibrate(data)
+        decoders = self.decoders
+        if crop:
+            decoders = sorted(decoders, key=lambda d: not d.crops)
+        error: Optional[Exception] = None
+        for decoder in decoders:
+            try:
+                return decoder.decode(data, size, crop)
+            except Exception as e:
+                error = e
+        raise ValueError(f'No decoder could read the frame: {error}')
+
+
+_chain: Optional[DecoderChain] = None
+_chain_lock = threading.Lock()
+
+
+def decoder_chain() -> DecoderChain:
+    """ The process wide chain used by the camera sources. """
+    global _chain
+    chain = _chain
+    if chain is None:
+        # Acquisition threads ask for it at the same time on startup.
+        with _chain_lock:
+            if _chain is None:
+                _chain = DecoderChain()
+            chain = _chain
+    return chain
+
+
+def set_decoders(names: List[str]) -> None:
+    """ Use these backends in this order instead of calibrating. """
+    global _chain
+    chain = DecoderChain(names)
+    chain.calibrated = True
+    with _chain_lock:
+        _chain = chain
@@ -1,12 +1,53 @@
 import time
+import threading
+import zlib
+from functools import lru_cache
 from qtpy.QtCore import Signal, QByteArray, QObject, QUrl, QThread, Qt, QRect, QRectF
-from qtpy.QtGui import  QImage, QPainter, QBrush, QPen
+from qtpy.QtGui import QImage, QPainter, QPen
 from qtpy.QtNetwork import QNetworkReply, QNetworkRequest, QNetworkAccessManager
-from typing import List, Any, Dict, Optional, NamedTuple
-from cv2 import VideoCapture
-import urllib.request
-from io import BytesIO
-from PIL import Image, ImageQt
+from typing import List, Any, Dict, Optional, NamedTuple, Tuple
+import http.client
+from .http_pool import pool
+from .mjpeg import MjpegStream
+from .scheduler import FrameScheduler
+from .rate_control import ewma
+from .backoff import Backoff
+from .history import FrameHistory
+from .decoders import clamp_crop, decoder_chain, jpeg_size
+from .frame import Frame, capture_time
+from .timing import StageTimings
+
+
+def decode_jpeg(data: bytes, size: Optional[Tuple[int, int]] = None,
+                crop: Optional[Tuple[int, int, int, int]] = None) -> QImage:
+    """ Decode compressed JPEG bytes into a QImage.
+
+    If a size is given the JPEG is decoded at the smallest 1/2, 1/4 or 1/8
+    scale that is still at least that large, the reduction happens in the
+    DCT domain so the full resolution image is never built. With a crop,
+    x, y, width and height in full resolution pixels, only that region is
+    returned and size applies to it. The fastest available backend from the
+    decoder registry is used.
+    """
+    return decoder_chain().decode(data, size, crop)
+
+
+@lru_cache(maxsize=32)
+def error_frame(message: str) -> QImage:
+    """ Render an error message once, later calls reuse the cached frame. """
+    image = QImage(400, 300, QImage.Format_RGB32)
+    image.fill(Qt.green)
+    painter = QPainter(image)
+    painter.fillRect(QRectF(100, 100, 200, 100), Qt.white)
+    painter.setPen(QPen(Qt.black))
+    painter.drawText(QRectF(100, 100, 200, 100), Qt.TextWordWrap, message)
+    painter.end()
+    return image
+
+
+def is_mjpeg_url(url: str) -> bool:
+    return url.lower().endswith('mjpg') or url.lower().endswith('cgi')
+
 
 class Downloader(QObject):
     imageReady = Signal(object)
@@ -20,16 +61,15 @@ class Downloader(QObject):
         self.buffer = QByteArray()
         self.reply: Optional[QNetworkReply] = None
         self.isMjpegFeed = False
+        self.mjpegStream: Optional[MjpegStream] = None
 
     def setUrl(self, url: str) -> None:
         self.url = url
         self.request.setUrl(QUrl(self.url))
-        if self.url.lower().endswith('mjpg') or self.url.lower().endswith('cgi'):
-            self.isMjpegFeed = True
-            self.mjpegCamera = VideoCapture(self.url)
-        else:
-            self.isMjpegFeed = False
-            self.mjpegCamera = None
+        if self.mjpegStream:
+            self.mjpegStream.close()
+            self.mjpegStream = None
+        self.isMjpegFeed = is_mjpeg_url(self.url)
 
 
     def downloadData(self) -> None:
@@ -38,12 +78,19 @@ class Downloader(QObject):
             self.reply = self.manager.get(self.request)
             self.reply.finished.connect(self.finished)
         elif self.isMjpegFeed:
-            if self.mjpegCamera:
-                retVal, currentFrame = self.mjpegCamera.read()
-                if currentFrame is not None:
-                    height, width = currentFrame.shape[:2]
-                    image = QImage(currentFrame, width, height, 3*width, QImage.Format_RGB888)
-                    self.imageReady.emit(image.rgbSwapped())
+            try:
+                if self.mjpegStream is None:
+                    self.mjpegStream = MjpegStream(self.url)
+                part = self.mjpegStream.read_part()
+            except (OSError, http.client.HTTPException):
+                part = None
+            if part is None:
+                if self.mjpegStream:
+                    self.mjpegStream.close()
+                self.mjpegStream = None
+                return
+            # Hand over the compressed part, it is only decoded if displayed.
+            self.imageReady.emit(QByteArray(part.data))
 
     def finished(self) -> None:
         """ Read the buffer, emit a signal with the new image in it. """
@@ -54,82 +101,295 @@ class Downloader(QObject):
             self.reply = None
 
 
-class VideoThread(QThread):
-    imageReady = Signal(object)
+class FrameSource:
+    """ Fan-out of acquired frames to the subscriptions of a camera source.
+
+    It also spots frames that did not change since the last one, so they can
+    skip the decode and everything after it. lastSeen is updated for every
+    frame the camera answers with, changed or not.
+    """
+    subscriptions: Tuple[Any, ...] = ()
+    frameKey: Optional[Tuple[Any, ...]] = None
+    etag: Optional[str] = None
+    lastModified: Optional[str] = None
+    lastSeen: float = 0.0
+    unchanged: int = 0
+    fetchCost: float = 0.0
+    decodeCost: float = 0.0
+    errorMessage: Optional[str] = None
+    # Set by the hub while no subscriber wants frames.
+    paused: bool = False
+
+    def addSubscription(self, subscription) -> None:
+        # Swap in a new tuple so the thread never sees a half updated list.
+        self.subscriptions = self.subscriptions + (subscription,)
+
+    def removeSubscription(self, subscription) -> None:
+        self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+
+    def decodeSize(self) -> Optional[Tuple[int, int]]:
+        """ The smallest decode size that satisfies every subscriber. """
+        if not self.subscriptions:
+            return None
+        width, height = 1, 1
+        for subscription in self.subscriptions:
+            size = subscription.decodeSize()
+            if size is None:
+                return None
+            width = max(width, size[0])
+            height = max(height, size[1])
+        return width, height
+
+    def decodeCrop(self) -> Optional[Tuple[int, int, int, int]]:
+        """ The region of the frame covering every subscriber's crop.
+
+        None, for the whole frame, as soon as one subscriber wants all of it.
+        """
+        if not self.subscriptions:
+            return None
+        left = top = float('inf')
+        right = bottom = 0
+        for subscription in self.subscriptions:
+            if subscription.crop is None:
+                return None
+            x, y, w, h = subscription.crop
+            left, top = min(left, x), min(top, y)
+            right, bottom = max(right, x + w), max(bottom, y + h)
+        return int(left), int(top), int(right - left), int(bottom - top)
+
+    def invalidate(self) -> None:
+        """ Force the next frame through the pipeline even if unchanged. """
+        self.frameKey = None
+
+    def conditionalHeaders(self) -> Dict[str, str]:
+        """ Request headers letting the camera answer 304 Not Modified. """
+        # A new subscriber, decode size or crop needs a full frame, not a 304.
+        if (self.frameKey is None or
+                self.frameKey[2:] != (self.decodeSize(), self.decodeCrop(), self.subscriptions)):
+            return {}
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.lastModified:
+            headers['If-Modified-Since'] = self.lastModified
+        return headers
+
+    def notModified(self) -> None:
+        self.lastSeen = time.monotonic()
+        self.unchanged += 1
+
+    def frameChanged(self, data: bytes, headers=None) -> Optional[Frame]:
+        """ Cheap check on the compressed bytes before decoding them.
 
+        Frames that did change are kept in the source's history and returned
+        as a new Frame, None is returned for an unchanged one.
+        """
+        self.lastSeen = time.monotonic()
+        if headers is not None:
+            self.etag = headers.get('ETag')
+            self.lastModified = headers.get('Last-Modified')
+        key = (zlib.crc32(data), len(data), self.decodeSize(), self.decodeCrop(),
+               self.subscriptions)
+        if key == self.frameKey:
+            self.unchanged += 1
+            return None
+        self.frameKey = key
+        record = self.history.append(data)
+        return Frame(self.url, record.sequence, record.timestamp, data, capture_time(headers))
+
+    def connected(self) -> None:
+        self.backoff.succeeded()
+        self.errorMessage = None
+
+    def failed(self) -> float:
+        """ Back off after a failed fetch, returning the seconds to wait.
+
+        The error frame is only published when the message changes, not on
+        every retry.
+        """
+        delay = self.backoff.failed()
+        if self.backoff.state == Backoff.OPEN:
+            message = f'Camera offline: {self.url}'
+        else:
+            message = f'Could not get data from: {self.url}'
+        if message != self.errorMessage:
+            print(message)
+            self.errorMessage = message
+            self.publish(Frame(self.url, image=error_frame(message)))
+        # The next real frame must be rendered even if it matches the last one.
+        self.invalidate()
+        return delay
+
+    def cost(self) -> float:
+        """ Average CPU seconds spent fetching and decoding one frame. """
+        return self.fetchCost + self.decodeCost
+
+    def decode(self, frame: Frame) -> Optional[Frame]:
+        """ Decode a frame's image, None if it could not be decoded. """
+        start = time.thread_time()
+        began = time.perf_counter()
+        frame.size = jpeg_size(frame.data) or (0, 0)
+        # Without the frame size the crop cannot be checked, decode it all.
+        crop = clamp_crop(self.decodeCrop(), *frame.size) if frame.size != (0, 0) else None
+        try:
+            image = decode_jpeg(frame.data, self.decodeSize(), crop)
+        except ValueError as e:
+            print(f'Could not decode frame from {self.url}: {e}')
+            self.invalidate()
+            return None
+        self.timings.record('decode', began, time.perf_counter())
+        self.decodeCost = ewma(self.decodeCost, time.thread_time() - start)
+        frame.crop = crop
+        frame.setImage(image)
+        return frame
+
+    def publish(self, frame: Optional[Frame]) -> None:
+        """ Offer a new frame to every subscriber.
+
+        If a subscriber was not due for it, the next frame is let through even
+        if unchanged, otherwise a slower subscriber could keep a stale image
+        for as long as the camera shows a static scene.
+        """
+        if frame is None:
+            return
+        skipped = False
+        for subscription in self.subscriptions:
+            if not subscription.offer(frame):
+                skipped = True
+        if skipped:
+            self.invalidate()
+
+
+class VideoThread(FrameSource, QThread):
     def camera_refresh(self):
         """ Only request a new image if this is the first/last completed. """
         if not self.isMjpegFeed:
             try:
-                file = BytesIO(urllib.request.urlopen(self.url, timeout=1000/self.fps).read())
-                img = Image.open(file)
-                qimage = ImageQt.ImageQt(img)
-                self.showing_error = False
-                self.imageReady.emit(qimage)
-            except urllib.error.URLError:
-                print('Error in URL')
-                qimage = self.draw_message(f'Could not get data from: {self.url}')
-                self.imageReady.emit(qimage)
-
-        elif self.isMjpegFeed and self.mjpegCamera:
-            retVal, currentFrame = self.mjpegCamera.read()
-            if currentFrame is not None:
-                height, width = currentFrame.shape[:2]
-                image = QImage(currentFrame, width, height, 3*width, QImage.Format_RGB888)
-                self.imageReady.emit(image.rgbSwapped())
-                #self.imageReady.emit(currentFrame)
-
-            
-        
-    def __init__(self, *args, fps=5, url='', parent=None, **kwargs):
+                start = time.thread_time()
+                began = time.perf_counter()
+                response = pool.request(self.url, timeout=self.timeout,
+                                        headers=self.conditionalHeaders())
+                self.timings.record('fetch', began, time.perf_counter())
+                self.fetchCost = ewma(self.fetchCost, time.thread_time() - start)
+                if response.status == 304:
+                    self.connected()
+                    self.notModified()
+                    return
+                if response.status != 200:
+                    raise http.client.HTTPException(f'HTTP {response.status}')
+            except (OSError, http.client.HTTPException):
+                self.connectionFailed()
+                return
+            self.connected()
+            frame = self.frameChanged(response.body, response.headers)
+            if frame:
+                self.publish(self.decode(frame))
+
+        elif self.isMjpegFeed:
+            # The camera pushes frames at its own rate, keep reading parts so
+            # the stream does not lag but only decode the ones that are due.
+            while self.acquire and not self.paused:
+                began = time.perf_counter()
+                try:
+                    if self.mjpegStream is None:
+                        self.mjpegStream = MjpegStream(self.url, timeout=self.timeout)
+                    part = self.mjpegStream.read_part()
+                except (OSError, http.client.HTTPException):
+                    part = None
+                if part is None:
+                    self.connectionFailed()
+                    return
+                self.timings.record('fetch', began, time.perf_counter())
+                self.connected()
+                if self.scheduler.ready():
+                    frame = self.frameChanged(part.data, part.headers)
+                    if frame:
+                        self.publish(self.decode(frame))
+                    return
+
+    def __init__(self, *args, fps=5, url='', parent=None, timeout=2.0, **kwargs):
         #QThread.__init__(self, *args, **kwargs)
         super().__init__(parent)
         self.fps = fps
         self.url = url
-        self.showing_error = False
+        self.timeout = timeout
         self.manager = QNetworkAccessManager(self)
         self.request = QNetworkRequest()
         self.request.setUrl(QUrl(self.url))
         self.buffer = QByteArray()
         self.reply: Optional[QNetworkReply] = None
         self.isMjpegFeed = False
+        self.mjpegStream: Optional[MjpegStream] = None
+        self.wake = threading.Event()
+        self.scheduler = FrameScheduler(fps, sleep=self.wake.wait)
+        self.backoff = Backoff()
+        self.history = FrameHistory()
+        self.timings = StageTimings(url)
         self.acquire = True
 
-        self.error_qimage = QImage(100, 100, QImage.Format_RGB32)
-        self.painter = QPainter(self.error_qimage)
-        self.painter.setBrush(QBrush(Qt.green))
-        self.painter.fillRect(QRectF(0,0,400,300),Qt.green)
-        self.painter.fillRect(QRectF(100,100,200,100),Qt.white)
-        self.painter.setPen(QPen(Qt.black))
-
     def setUrl(self, url: str) -> None:
         self.url = url
+        self.timings.name = url
         self.request.setUrl(QUrl(self.url))
-        if self.url.lower().endswith('mjpg') or self.url.lower().endswith('cgi'):
-            self.isMjpegFeed = True
-            self.mjpegCamera = VideoCapture(self.url)
-        else:
-            self.isMjpegFeed = False
-            self.mjpegCamera = None
+        self.closeStream()
+        self.isMjpegFeed = is_mjpeg_url(self.url)
+
+    def closeStream(self) -> None:
+        if self.mjpegStream:
+            self.mjpegStream.close()
+            self.mjpegStream = None
+
+    def connectionFailed(self) -> None:
+        self.closeStream()
+        if self.acquire:
+            self.failed()
 
     def setFPS(self, fps: int) -> None:
         self.fps = fps
+        self.scheduler.fps = fps
+
+    def setPaused(self, paused: bool) -> None:
+        """ Stop fetching without stopping the thread, resuming is immediate. """
+        resumed = self.paused and not paused
+        self.paused = paused
+        if resumed:
+            self.wake.set()
     
     def updateCam(self, camera_object):
         self.camera_object = camera_object
         
     def run(self):
+        self.scheduler.reset()
+        self.backoff.reset()
         while self.acquire:
+            if self.paused:
+                # Let go of the camera until resumed or stopped.
+                self.closeStream()
+                self.wake.wait()
+                self.scheduler.reset()
+                continue
+            if self.wake.is_set():
+                # Left set by a resume, only a stop may cut the sleeps short.
+                self.wake.clear()
+                continue
+            delay = self.backoff.remaining()
+            if delay > 0:
+                self.wake.wait(delay)
+                continue
             self.camera_refresh()
-            self.msleep(int(1000/self.fps))
+            if not self.isMjpegFeed:
+                self.scheduler.wait()
+        self.closeStream()
 
     def start(self):
         self.acquire = True
+        self.wake.clear()
         super().start()
 
     def stop(self):
+        """ Ask the thread to finish, waking it from any sleep or blocking read. """
         self.acquire = False
-
-    def draw_message(self, message: str) -> QImage:
-        self.painter.drawText(QRectF(100,100,200,100), message)
-        return self.error_qimage
\ No newline at end of file
+        self.wake.set()
+        stream = self.mjpegStream
+        if stream:
+            stream.abort()
@@ -0,0 +1,92 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+from qtpy.QtCore import QRect
+from qtpy.QtGui import QImage
+
+
+class Frame:
+    """ One camera frame and what is known about it, passed down the pipeline.
+
+    It is created by the source when the compressed data arrives, filled in
+    when decoded, and every subscription gets its own shallow copy so a widget
+    can replace the image with its plugins' output without touching what the
+    other widgets see. Timestamps are wall clock seconds, captured comes from
+    the camera's X-Timestamp header and falls back to the receive time. size
+    is the full resolution size of the camera frame even if image was decoded
+    or scaled smaller, sequence numbers match the source's FrameHistory.
+    crop is the region of the full frame the image holds, x, y, width and
+    height in full resolution pixels, None when it holds the whole frame.
+    results maps the frame plugins that ran on it to what they found.
+    """
+    __slots__ = ('source', 'sequence', 'captured', 'received', 'decoded',
+                 'size', 'crop', 'format', 'data', 'image', 'results')
+
+    def __init__(self, source: str, sequence: int = -1, received: Optional[float] = None,
+                 data: bytes = b'', captured: Optional[float] = None,
+                 image: Optional[QImage] = None) -> None:
+        self.source = source
+        self.sequence = sequence
+        self.received = received if received is not None else time.time()
+        self.captured = captured if captured is not None else self.received
+        self.decoded = 0.0
+        self.size: Tuple[int, int] = (0, 0)
+        self.crop: Optional[Tuple[int, int, int, int]] = None
+        self.format = QImage.Format_Invalid
+        self.data = data
+        self.image = image
+        self.results: Dict[Any, Any] = {}
+        if image is not None:
+            self.setImage(image, decoded=self.received)
+
+    def setImage(self, image: QImage, decoded: Optional[float] = None) -> None:
+        """ Attach the decoded image, size defaults to the image's own. """
+        self.image = image
+        self.decoded = decoded if decoded is not None else time.time()
+        self.format = image.format()
+        if self.size == (0, 0):
+            self.size = (image.width(), image.height())
+
+    def copy(self, image: Optional[QImage] = None) -> 'Frame':
+        frame = Frame.__new__(Frame)
+        for name in self.__slots__:
+            setattr(frame, name, getattr(self, name))
+        if image is not None:
+            frame.image = image
+        frame.results = dict(self.results)
+        return frame
+
+    def cropped(self, crop: Tuple[int, int, int, int],
+                image: Optional[QImage] = None) -> QImage:
+        """ Cut a region given in full resolution pixels out of the image.
+
+        The image defaults to the frame's own and may be decoded smaller or
+        already cropped to another region.
+        """
+        image = image if image is not None else self.image
+        region = self.crop or (0, 0) + self.size
+        if region[2] <= 0 or region[3] <= 0:
+            return image.copy(QRect(*crop))
+        fx = image.width() / region[2]
+        fy = image.height() / region[3]
+        x, y, w, h = crop
+        return image.copy(QRect(int((x - region[0]) * fx), int((y - region[1]) * fy),
+                                max(1, round(w * fx)), max(1, round(h * fy))))
+
+    def latency(self, now: Optional[float] = None) -> float:
+        """ Seconds from capture until now. """
+        return (now if now is not None else time.time()) - self.captured
+
+    def __repr__(self) -> str:
+        return (f'Frame({self.source!r}, sequence={self.sequence}, '
+                f'size={self.size[0]}x{self.size[1]}, bytes={len(self.data)})')
+
+
+def capture_time(headers: Any) -> Optional[float]:
+    """ The capture time a camera put in the X-Timestamp header, if any. """
+    if not headers:
+        return None
+    value = headers.get('X-Timestamp') or headers.get('x-timestamp')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,99 @@
+""" Pixel memory shared between QImage and NumPy without copying.
+
+image_to_array() views an image's pixels as an array and array_to_image()
+wraps an array's pixels in an image. Either way only one copy of the pixels
+exists, and whichever side was made from the other keeps it alive, so
+neither frees the memory while the other still uses it. Formats map to
+arrays as:
+
+    Format_RGB32, Format_ARGB32   height x width x 4, bytes B, G, R, X
+    Format_RGB888                 height x width x 3, bytes R, G, B
+    Format_BGR888                 height x width x 3, bytes B, G, R
+    Format_Grayscale8             height x width
+
+Format_BGR888 is the layout of OpenCV arrays, it needs Qt 5.14.
+"""
+from typing import Any, Dict, Optional
+from qtpy.QtGui import QImage
+
+# Bytes per pixel of the formats shared without conversion.
+CHANNELS: Dict[Any, int] = {
+    QImage.Format_RGB32: 4,
+    QImage.Format_ARGB32: 4,
+    QImage.Format_RGB888: 3,
+    QImage.Format_Grayscale8: 1,
+}
+if hasattr(QImage, 'Format_BGR888'):
+    CHANNELS[QImage.Format_BGR888] = 3
+
+
+class _ImageMemory:
+    """ Exposes a QImage's pixels through the NumPy array interface.
+
+    Arrays made from it keep it as their base, and it keeps the image.
+    """
+
+    def __init__(self, image: QImage, writeable: bool = False) -> None:
+        self.image = image
+        channels = CHANNELS[image.format()]
+        # bits() detaches the image from any implicitly shared copies first.
+        bits = image.bits() if writeable else image.constBits()
+        if hasattr(bits, 'setsize'):
+            # PyQt hands out a sip.voidptr, PySide a memoryview.
+            bits.setsize(image.bytesPerLine() * image.height())
+        if channels == 1:
+            shape = (image.height(), image.width())
+            strides = (image.bytesPerLine(), 1)
+        else:
+            shape = (image.height(), image.width(), channels)
+            strides = (image.bytesPerLine(), channels, 1)
+        self.__array_interface__ = {
+            'version': 3,
+            'shape': shape,
+            'typestr': '|u1',
+            'strides': strides,
+            'data': bits,
+        }
+
+
+def image_to_array(image: QImage, writeable: bool = False) -> Any:
+    """ A NumPy view of an image's pixels, see the module for the layouts.
+
+    Formats not in the table are converted to Format_RGB32 first, which is
+    the only case that copies. A writeable view changes the image itself.
+    """
+    import numpy
+    if image.format() not in CHANNELS:
+        image = image.convertToFormat(QImage.Format_RGB32)
+    array = numpy.asarray(_ImageMemory(image, writeable))
+    if not writeable:
+        array.flags.writeable = False
+    return array
+
+
+def array_to_image(array: Any, format: Optional[Any] = None, copy: bool = False) -> QImage:
+    """ A QImage of an array's pixels, see the module for the layouts.
+
+    The format defaults to Format_Grayscale8, Format_BGR888 or Format_RGB32
+    by the number of channels. Without copy the image uses the array's
+    memory and holds a reference to it, so the array must not be written to
+    while the image is in use. Rows only need to be contiguous, an array
+    with gaps between them is shown as it is.
+    """
+    import numpy
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    if format is None:
+        format = {1: QImage.Format_Grayscale8, 3: getattr(QImage, 'Format_BGR888', None),
+                  4: QImage.Format_RGB32}.get(channels)
+    if format is None or CHANNELS.get(format) != channels:
+        raise ValueError(f'Cannot show a {channels} channel array as image format {format}')
+    if (array.dtype != numpy.uint8 or array.strides[0] < array.shape[1] * channels
+            or array.strides[1:] != ((channels, 1) if channels > 1 else (1,))):
+        array = numpy.ascontiguousarray(array, numpy.uint8)
+    height, width = array.shape[:2]
+    image = QImage(array.data, width, height, array.strides[0], format)
+    if copy:
+        return image.copy()
+    # Qt does not own the pixels, the wrapper keeps them alive.
+    image._array = array
+    return image
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, List, NamedTuple, Optional
+
+
+class FrameRecord(NamedTuple):
+    sequence: int
+    timestamp: float
+    data: bytes
+
+
+class FrameHistory:
+    """ Ring buffer of the compressed frames of one camera.
+
+    It is bounded by a memory budget in bytes rather than a frame count, the
+    oldest frames are dropped once the JPEG data no longer fits. Sequence
+    numbers increase by one for every stored frame, timestamps are wall clock
+    seconds taken when the frame was received.
+    """
+
+    def __init__(self, budget: int = 32 * 1024 * 1024) -> None:
+        self.budget = budget
+        self.size = 0
+        self.sequence = 0
+        self._frames: Deque[FrameRecord] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def append(self, data: bytes, timestamp: Optional[float] = None) -> FrameRecord:
+        with self._lock:
+            record = FrameRecord(self.sequence, timestamp or time.time(), data)
+            self.sequence += 1
+            self._frames.append(record)
+            self.size += len(data)
+            while self.size > self.budget and len(self._frames) > 1:
+                self.size -= len(self._frames.popleft().data)
+        return record
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self.size = 0
+
+    def first(self) -> Optional[FrameRecord]:
+        with self._lock:
+            return self._frames[0] if self._frames else None
+
+    def latest(self) -> Optional[FrameRecord]:
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def get(self, sequence: int) -> Optional[FrameRecord]:
+        """ The frame with that sequence number, clamped to what is stored. """
+        with self._lock:
+            if not self._frames:
+                return None
+            index = sequence - self._frames[0].sequence
+            index = min(max(index, 0), len(self._frames) - 1)
+            return self._frames[index]
+
+    def at(self, timestamp: float) -> Optional[FrameRecord]:
+        """ The frame that was showing at that time, or the oldest one kept. """
+        with self._lock:
+            found = self._frames[0] if self._frames else None
+            for record in self._frames:
+                if record.timestamp > timestamp:
+                    break
+                found = record
+            return found
+
+    def window(self, start: float, end: float) -> List[FrameRecord]:
+        with self._lock:
+            return [r for r in self._frames if start <= r.timestamp <= end]
+
+    def save(self, filename: str, start: float = 0.0, end: float = float('inf')) -> int:
+        """ Write a time window as a multipart MJPEG file, returning the frame count.
+
+        Each part carries its sequence number and timestamp in X-Sequence and
+        X-Timestamp headers.
+        """
+        records = self.window(start, end)
+        with open(filename, 'wb') as f:
+            for record in records:
+                f.write(b'--frame\r\nContent-Type: image/jpeg\r\n')
+                f.write(f'Content-Length: {len(record.data)}\r\n'
+                        f'X-Sequence: {record.sequence}\r\n'
+                        f'X-Timestamp: {record.timestamp:.6f}\r\n\r\n'.encode('latin-1'))
+                f.write(record.data)
+                f.write(b'\r\n')
+        return len(records)
@@ -0,0 +1,115 @@
+import http.client
+import select
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class Response:
+    """ A fully read HTTP response, the connection is already back in the pool. """
+
+    def __init__(self, status: int, headers: http.client.HTTPMessage, body: bytes) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class ConnectionPool:
+    """ Keep-alive HTTP connections shared between threads, keyed by host.
+
+    Cameras serving a single JPEG per request are polled many times a second,
+    reusing the socket avoids a DNS lookup and TCP handshake for every frame.
+    """
+
+    def __init__(self, max_idle: int = 4) -> None:
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str, Optional[int]], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme: str, host: str, port: Optional[int],
+                 timeout: float) -> http.client.HTTPConnection:
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    @staticmethod
+    def _stale(conn: http.client.HTTPConnection) -> bool:
+        """ True if an idle connection was closed by the camera.
+
+        Nothing was asked for on it, so a readable socket is either at its end
+        or holds data no request will read.
+        """
+        if conn.sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _checkout(self, key, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        stale = []
+        try:
+            with self._lock:
+                idle = self._idle.get(key)
+                while idle:
+                    conn = idle.pop()
+                    if self._stale(conn):
+                        stale.append(conn)
+                        continue
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+        finally:
+            for conn in stale:
+                conn.close()
+        return self._connect(*key, timeout=timeout), False
+
+    def _checkin(self, key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, url: str, timeout: float = 5.0,
+                headers: Optional[Dict[str, str]] = None) -> Response:
+        """ GET the url, raising OSError or http.client.HTTPException on failure. """
+        parts = urlsplit(url)
+        key = (parts.scheme or 'http', parts.hostname or 'localhost', parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        conn, reused = self._checkout(key, timeout)
+        while True:
+            try:
+                conn.request('GET', path, headers=headers or {})
+                reply = conn.getresponse()
+                body = reply.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                # The camera may close an idle keep-alive socket after it was
+                # checked, retry once on a fresh connection before giving up.
+                if reused:
+                    conn, reused = self._connect(*key, timeout=timeout), False
+                    continue
+                raise
+            response = Response(reply.status, reply.msg, body)
+            if reply.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return response
+
+    def clear(self) -> None:
+        """ Close every idle connection. """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+pool = ConnectionPool()
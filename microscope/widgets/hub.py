@@ -0,0 +1,202 @@
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from qtpy.QtCore import Qt
+from .downloader import VideoThread
+from .frame import Frame
+from .async_engine import AsyncSource
+from .mailbox import FrameMailbox
+from .scheduler import FrameScheduler
+from .rate_control import RateController, ewma
+from .timing import StageTimings
+
+
+class Subscription(FrameMailbox):
+    """ One widget's view of a shared camera source.
+
+    Frames are offered by the source's acquisition thread, each subscription
+    applies its own rate cap and downscale before leaving the frame in its
+    mailbox. maxFps is the configured rate, fps the current one which an
+    adaptive subscription lets the rate controller lower. A paused
+    subscription gets no frames and does not count towards the source's rate.
+    offeredAt is the perf_counter() time the frame in the mailbox was left
+    there. Without resample the frame is only reduced in the decoder and the
+    widget fits the rest with a transform. With a crop only that region of the
+    frame is decoded, as far as the other subscriptions allow, and delivered.
+    framePlugins run on every frame delivered, in the acquisition thread.
+    """
+
+    def __init__(self, url: str, fps: int = 5, scale: Optional[List[int]] = None,
+                 adaptive: bool = False, priority: int = 0) -> None:
+        super().__init__()
+        self.url = url
+        self.scale: List[int] = scale if scale else []
+        self.scheduler = FrameScheduler(fps)
+        self.maxFps = fps
+        self.adaptive = adaptive
+        self.priority = priority
+        self.renderCost = 0.0
+        self.offeredAt = 0.0
+        self.paused = False
+        self.resample = True
+        self.crop: Optional[Tuple[int, int, int, int]] = None
+        self.framePlugins: Tuple[Any, ...] = ()
+        self.timings = StageTimings(url)
+
+    @property
+    def fps(self) -> int:
+        return self.scheduler.fps
+
+    @fps.setter
+    def fps(self, fps: int) -> None:
+        self.scheduler.fps = fps
+
+    def reportRender(self, seconds: float) -> None:
+        """ CPU time the GUI spent rendering one frame of this subscription. """
+        self.renderCost = ewma(self.renderCost, seconds)
+
+    def decodeSize(self) -> Optional[Tuple[int, int]]:
+        """ The size this subscriber displays at, None for full resolution. """
+        if len(self.scale) == 2:
+            if self.scale[0] > 0:
+                return self.scale[0], 1
+            if self.scale[1] > 0:
+                return 1, self.scale[1]
+        return None
+
+    def offer(self, frame: Frame) -> bool:
+        """ Called from the acquisition thread for every new frame.
+
+        Returns False if the frame was turned away by the rate cap, a paused
+        subscription does not want frames at all and counts as taking it.
+        """
+        if self.paused:
+            return True
+        # Error frames have no data and are only published once, so they
+        # skip the rate cap to be sure every view shows them.
+        if frame.data and not self.scheduler.ready():
+            return False
+        image = frame.image
+        crop = frame.crop
+        if self.crop is not None and frame.data and crop != self.crop:
+            # The source decoded a region covering other subscriptions too.
+            image = frame.cropped(self.crop)
+            crop = self.crop
+        if self.resample and len(self.scale) == 2:
+            start = time.perf_counter()
+            # Smooth scaling averages over the source pixels when shrinking.
+            if self.scale[0] > 0 and image.width() > self.scale[0]:
+                image = image.scaledToWidth(self.scale[0], Qt.SmoothTransformation)
+            elif self.scale[1] > 0 and image.height() > self.scale[1]:
+                image = image.scaledToHeight(self.scale[1], Qt.SmoothTransformation)
+            self.timings.record('downscale', start, time.perf_counter())
+        self.offeredAt = time.perf_counter()
+        # The widget replaces the image with its plugins' output, so each
+        # subscription gets its own envelope.
+        frame = frame.copy(image)
+        frame.crop = crop
+        if frame.data:
+            self.process(frame)
+        self.put(frame)
+        return True
+
+    def process(self, frame: Frame) -> None:
+        """ Run the frame plugins, a failing plugin does not stop the others. """
+        for plugin in self.framePlugins:
+            start = time.perf_counter()
+            try:
+                plugin.process(frame)
+            except Exception as e:
+                print(f'Frame plugin {plugin.name} failed: {e}')
+            self.timings.record('frame:' + plugin.name, start, time.perf_counter())
+
+
+Source = Union[VideoThread, AsyncSource]
+
+BACKENDS = {
+    'thread': VideoThread,
+    'asyncio': AsyncSource,
+}
+
+
+class CameraHub:
+    """ Owns one acquisition source per camera url and fans frames out.
+
+    Any number of widgets can subscribe to the same url, the camera is only
+    polled once at the highest rate any subscriber asks for. The backend is
+    picked by the first subscriber of a url: a VideoThread per camera, or an
+    AsyncSource sharing the single asyncio engine. The hub is only used from
+    the GUI thread.
+    """
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, Source] = {}
+        self._retired: Set[Source] = set()
+        self.controller: Optional[RateController] = None
+
+    def subscribe(self, url: str, fps: int = 5, scale: Optional[List[int]] = None,
+                  backend: str = 'thread', adaptive: bool = False,
+                  priority: int = 0) -> Subscription:
+        if self.controller is None:
+            self.controller = RateController(self)
+        subscription = Subscription(url, fps, scale, adaptive, priority)
+        source = self._sources.get(url)
+        if source is None:
+            source = BACKENDS.get(backend, VideoThread)(fps=fps, url=url)
+            source.setUrl(url)
+            self._sources[url] = source
+        source.addSubscription(subscription)
+        self._updateRate(source)
+        if not source.isRunning():
+            source.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        source = self._sources.get(subscription.url)
+        if source is None:
+            return
+        source.removeSubscription(subscription)
+        if source.subscriptions:
+            self._updateRate(source)
+            return
+        del self._sources[subscription.url]
+        source.stop()
+        if not source.wait(500):
+            # Keep a reference until the thread really finishes.
+            self._retired.add(source)
+            source.finished.connect(lambda: self._retired.discard(source))
+
+    def setFPS(self, subscription: Subscription, fps: int) -> None:
+        """ Set the configured rate, the ceiling for adaptive subscriptions. """
+        subscription.maxFps = fps
+        self.adjustFPS(subscription, fps)
+
+    def adjustFPS(self, subscription: Subscription, fps: float) -> None:
+        """ Change the current rate, keeping it under the configured one. """
+        subscription.fps = min(fps, subscription.maxFps)
+        source = self._sources.get(subscription.url)
+        if source is not None:
+            self._updateRate(source)
+
+    def setPaused(self, subscription: Subscription, paused: bool) -> None:
+        """ Pause a subscription, the camera is only fetched while one is not. """
+        if subscription.paused == paused:
+            return
+        subscription.paused = paused
+        source = self._sources.get(subscription.url)
+        if source is not None:
+            self._updateRate(source)
+
+    def source(self, url: str) -> Optional[Source]:
+        return self._sources.get(url)
+
+    def sources(self) -> List[Source]:
+        return list(self._sources.values())
+
+    def _updateRate(self, source: Source) -> None:
+        active = [s for s in source.subscriptions if not s.paused]
+        if active:
+            source.setFPS(max(s.fps for s in active))
+        source.setPaused(not active)
+
+
+hub = CameraHub()
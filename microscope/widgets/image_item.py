@@ -0,0 +1,48 @@
+from typing import Optional
+from qtpy.QtCore import QRectF
+from qtpy.QtGui import QImage, QPainter, QPixmap
+from qtpy.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem, QWidget
+
+
+class ImageItem(QGraphicsItem):
+    """ Scene item showing the camera image.
+
+    Unlike QGraphicsPixmapItem, showing a new image of the same size converts
+    it into the existing pixmap in place and only schedules a repaint of the
+    item, the geometry and the scene's index are left alone. Only the part of
+    the pixmap that is exposed is drawn.
+    """
+
+    def __init__(self, parent: Optional[QGraphicsItem] = None) -> None:
+        super().__init__(parent)
+        self._pixmap = QPixmap()
+        self._rect = QRectF()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self) -> QRectF:
+        return self._rect
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem,
+              widget: Optional[QWidget] = None) -> None:
+        exposed = option.exposedRect & self._rect
+        if not exposed.isEmpty():
+            painter.drawPixmap(exposed, self._pixmap, exposed)
+
+    def pixmap(self) -> QPixmap:
+        return self._pixmap
+
+    def setPixmap(self, pixmap: QPixmap) -> None:
+        if pixmap.size() != self._pixmap.size():
+            self.prepareGeometryChange()
+            self._rect = QRectF(pixmap.rect())
+        self._pixmap = pixmap
+        self.update()
+
+    def setImage(self, image: QImage) -> bool:
+        """ Show an image, returning True if the size changed. """
+        if not self._pixmap.isNull() and image.size() == self._pixmap.size():
+            self._pixmap.convertFromImage(image)
+            self.update()
+            return False
+        self.setPixmap(QPixmap.fromImage(image))
+        return True
@@ -0,0 +1,39 @@
+import threading
+from typing import Any, Optional
+from qtpy.QtCore import QObject, Signal
+
+
+class FrameMailbox(QObject):
+    """ Single slot hand-off of frames from an acquisition thread to the GUI.
+
+    The acquisition side overwrites the slot with put(), the GUI drains it with
+    take(). frameAvailable is only emitted when the slot goes from empty to
+    full, so at most one notification is ever queued and a busy GUI thread
+    picks up the newest frame instead of a backlog. Overwritten frames are
+    counted in dropped.
+    """
+    frameAvailable = Signal()
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._frame: Any = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def put(self, frame: Any) -> None:
+        with self._lock:
+            stale = self._frame is not None
+            self._frame = frame
+            if stale:
+                self.dropped += 1
+        if not stale:
+            self.frameAvailable.emit()
+
+    def take(self) -> Any:
+        """ Return the latest frame and empty the slot, None if there is none. """
+        with self._lock:
+            frame, self._frame = self._frame, None
+            if frame is not None:
+                self.delivered += 1
+        return frame
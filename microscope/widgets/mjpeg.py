@@ -0,0 +1,148 @@
+import http.client
+import socket
+from typing import Dict, Iterator, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+
+class MjpegPart(NamedTuple):
+    headers: Dict[str, str]
+    data: bytes
+
+
+def boundary_from_content_type(content_type: str) -> Optional[bytes]:
+    """ Pull the boundary out of a multipart/x-mixed-replace content type. """
+    for param in content_type.split(';')[1:]:
+        key, _, value = param.strip().partition('=')
+        if key.lower() == 'boundary' and value:
+            value = value.strip('"')
+            # Some cameras already prefix the boundary with the dashes.
+            if value.startswith('--'):
+                value = value[2:]
+            return value.encode('latin-1')
+    return None
+
+
+class MjpegParser:
+    """ Incremental multipart/x-mixed-replace parser, it never touches a socket.
+
+    Bytes are appended with feed() and complete parts pulled out with
+    next_part(). A single bytearray is reused for the whole stream, consumed
+    data is trimmed from the front of it.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self.boundary = boundary
+        self.buffer = bytearray()
+        self._headers: Optional[Dict[str, str]] = None
+        self._length: Optional[int] = None
+
+    def feed(self, data) -> None:
+        self.buffer += data
+
+    def _read_headers(self) -> bool:
+        start = self.buffer.find(self.boundary)
+        if start < 0:
+            # Keep just enough to match a boundary split across two reads.
+            del self.buffer[:-len(self.boundary)]
+            return False
+        end = self.buffer.find(b'\r\n\r\n', start)
+        if end < 0:
+            del self.buffer[:start]
+            return False
+        lines = bytes(self.buffer[start:end]).split(b'\r\n')[1:]
+        del self.buffer[:end + 4]
+        self._headers = {}
+        for line in lines:
+            key, _, value = line.decode('latin-1').partition(':')
+            self._headers[key.strip().lower()] = value.strip()
+        try:
+            self._length = int(self._headers['content-length'])
+        except (KeyError, ValueError):
+            self._length = None
+        return True
+
+    def next_part(self) -> Optional[MjpegPart]:
+        """ Return the next complete part, or None if more data is needed. """
+        if self._headers is None and not self._read_headers():
+            return None
+        if self._length is not None:
+            if len(self.buffer) < self._length:
+                return None
+            data = bytes(self.buffer[:self._length])
+            del self.buffer[:self._length]
+        else:
+            end = self.buffer.find(self.boundary)
+            if end < 0:
+                return None
+            data = bytes(self.buffer[:end]).rstrip(b'-').rstrip(b'\r\n')
+            del self.buffer[:end]
+        part = MjpegPart(self._headers, data)
+        self._headers = None
+        self._length = None
+        return part
+
+
+class MjpegStream:
+    """ Blocking reader for an MJPEG url, yielding the raw JPEG parts. """
+
+    def __init__(self, url: str, timeout: float = 2.0, read_timeout: float = 5.0,
+                 chunk_size: int = 65536) -> None:
+        self.url = url
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if parts.scheme == 'https':
+            self.connection = http.client.HTTPSConnection(parts.hostname, parts.port, timeout=timeout)
+        else:
+            self.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        try:
+            self.connection.request('GET', path)
+            # A close delimited response takes the socket off the connection.
+            self.sock = self.connection.sock
+            self.response = self.connection.getresponse()
+            if self.response.status != 200:
+                raise http.client.HTTPException(f'HTTP {self.response.status}')
+            boundary = boundary_from_content_type(self.response.getheader('Content-Type', ''))
+            if not boundary:
+                raise http.client.HTTPException('Not a multipart stream')
+        except Exception:
+            self.connection.close()
+            raise
+        # Connecting should be quick, but frames may be a while apart.
+        self.sock.settimeout(read_timeout)
+        self.parser = MjpegParser(boundary)
+        self.chunk_size = chunk_size
+        # Reused for every read, the parser copies out what it needs.
+        self.chunk = bytearray(chunk_size)
+        self.view = memoryview(self.chunk)
+
+    def read_part(self) -> Optional[MjpegPart]:
+        """ Block until the next part arrives, None when the stream ends. """
+        part = self.parser.next_part()
+        while part is None:
+            # readinto1 returns whatever has arrived, readinto would block
+            # until the whole chunk is filled.
+            size = self.response.readinto1(self.chunk)
+            if not size:
+                return None
+            self.parser.feed(self.view[:size])
+            part = self.parser.next_part()
+        return part
+
+    def __iter__(self) -> Iterator[MjpegPart]:
+        part = self.read_part()
+        while part is not None:
+            yield part
+            part = self.read_part()
+
+    def close(self) -> None:
+        self.response.close()
+        self.connection.close()
+
+    def abort(self) -> None:
+        """ Wake a read blocked in another thread, it then sees the stream end. """
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
@@ -0,0 +1,70 @@
+from typing import TYPE_CHECKING, List
+from qtpy.QtCore import QObject, QTimer
+if TYPE_CHECKING:
+    from .hub import CameraHub, Subscription
+
+
+def ewma(average: float, sample: float, alpha: float = 0.2) -> float:
+    """ Exponentially weighted moving average, seeded by the first sample. """
+    if average <= 0.0:
+        return sample
+    return average + alpha * (sample - average)
+
+
+class RateController(QObject):
+    """ Keeps the CPU spent on all cameras within a budget.
+
+    The cost of a camera is modelled from measured CPU time: fetch and decode
+    are paid once per source frame, rendering once per subscriber frame. Once
+    a second the projected load is compared with the budget (in cores).
+    Adaptive subscriptions are slowed down lowest priority first when over
+    budget, and sped back up highest priority first, never above their
+    configured fps, when there is headroom again.
+    """
+
+    def __init__(self, hub: "CameraHub", budget: float = 0.8,
+                 interval: int = 1000, min_fps: float = 1.0) -> None:
+        super().__init__()
+        self.hub = hub
+        self.budget = budget
+        self.min_fps = min_fps
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.balance)
+        self.timer.start(interval)
+
+    def load(self) -> float:
+        """ Projected CPU load in cores at the current rates. """
+        load = 0.0
+        for source in self.hub.sources():
+            if source.paused:
+                continue
+            load += source.cost() * source.fps
+            for subscription in source.subscriptions:
+                if not subscription.paused:
+                    load += subscription.renderCost * subscription.fps
+        return load
+
+    def adaptive(self) -> "List[Subscription]":
+        return [s for source in self.hub.sources()
+                for s in source.subscriptions if s.adaptive and not s.paused]
+
+    def balance(self) -> None:
+        subscriptions = self.adaptive()
+        if not subscriptions:
+            return
+        load = self.load()
+        if load > self.budget:
+            for subscription in sorted(subscriptions, key=lambda s: s.priority):
+                while load > self.budget and subscription.fps > self.min_fps:
+                    self.hub.adjustFPS(subscription, max(self.min_fps, subscription.fps * 0.75))
+                    load = self.load()
+                if load <= self.budget:
+                    return
+        elif load < self.budget * 0.75:
+            for subscription in sorted(subscriptions, key=lambda s: -s.priority):
+                while subscription.fps < subscription.maxFps:
+                    previous = subscription.fps
+                    self.hub.adjustFPS(subscription, min(subscription.maxFps, previous + 1))
+                    if self.load() > self.budget * 0.9:
+                        self.hub.adjustFPS(subscription, previous)
+                        return
@@ -0,0 +1,78 @@
+import time
+from typing import Callable, Optional
+
+
+class FrameScheduler:
+    """ Paces frames on a fixed grid of deadlines at the target frame rate.
+
+    Deadlines are anchored to the monotonic clock, so the time spent fetching
+    and decoding a frame comes out of the period instead of being added to it.
+    A frame that overruns is started as soon as possible and counted as late,
+    any whole periods it swallowed are skipped and counted as dropped rather
+    than being caught up in a burst. Push sources deliver on the camera's
+    clock rather than on the deadlines, their frames only count as late when
+    the gap since the previous one is over one and a half periods.
+    """
+
+    def __init__(self, fps: float = 5, sleep: Callable[[float], None] = time.sleep) -> None:
+        self.fps = fps
+        self.sleep = sleep
+        self.deadline: Optional[float] = None
+        # When ready() last accepted a frame.
+        self.last: Optional[float] = None
+        self.frames = 0
+        self.late = 0
+        self.dropped = 0
+
+    @property
+    def period(self) -> float:
+        return 1.0 / max(self.fps, 0.001)
+
+    def reset(self) -> None:
+        """ Start a new schedule on the next tick and clear the counters. """
+        self.deadline = None
+        self.last = None
+        self.frames = 0
+        self.late = 0
+        self.dropped = 0
+
+    def _tick(self, now: float, count: bool = True) -> float:
+        """ Advance to the next deadline, returning how long until it is due. """
+        self.frames += 1
+        if self.deadline is None:
+            self.deadline = now
+            return 0.0
+        due = self.deadline + self.period
+        if now <= due:
+            self.deadline = due
+            return due - now
+        missed = int((now - due) // self.period)
+        if count:
+            self.late += 1
+            self.dropped += missed
+        self.deadline = due + missed * self.period
+        return 0.0
+
+    def next_delay(self) -> float:
+        """ Advance the schedule, returning the seconds until the next frame. """
+        return self._tick(time.monotonic())
+
+    def wait(self) -> None:
+        """ Block until the next frame is due. """
+        delay = self.next_delay()
+        if delay > 0:
+            self.sleep(delay)
+
+    def ready(self) -> bool:
+        """ Non-blocking variant for push sources, True if a frame is due now. """
+        now = time.monotonic()
+        # Accept frames up to half a period early, a source running at the
+        # same rate with a little jitter would otherwise be halved.
+        if self.deadline is not None and now < self.deadline + self.period / 2:
+            return False
+        self._tick(now, count=False)
+        if self.last is not None and now - self.last > self.period * 1.5:
+            self.late += 1
+            self.dropped += int((now - self.last) / self.period) - 1
+        self.last = now
+        return True
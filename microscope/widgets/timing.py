@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+class Histogram:
+    """ Durations in power of two microsecond buckets.
+
+    Bucket i counts durations of less than 2**i microseconds that did not fit
+    in bucket i - 1, so adding a sample is a bit_length and an increment.
+    """
+    BUCKETS = 32
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self) -> None:
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """ Estimate in seconds, interpolated within the bucket holding it. """
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                low = 2 ** (i - 1) if i else 0
+                estimate = low + (2 ** i - low) * (target - seen) / count
+                return min(estimate / 1e6, self.maximum)
+            seen += count
+        return self.maximum
+
+    def summary(self) -> Dict[str, float]:
+        mean = self.total / self.count if self.count else 0.0
+        return {'count': self.count, 'mean': mean, 'p50': self.percentile(0.5),
+                'p99': self.percentile(0.99), 'max': self.maximum}
+
+
+class StageTimings:
+    """ Histograms of how long each stage of the pipeline takes for one camera.
+
+    Stages are recorded from whichever thread runs them with perf_counter()
+    timestamps taken at the stage boundaries. Each stage is only ever recorded
+    from one thread at a time, so no lock is taken.
+    """
+
+    def __init__(self, name: str = '') -> None:
+        self.name = name
+        self.stages: Dict[str, Histogram] = {}
+
+    def record(self, stage: str, start: float, end: float) -> None:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, Histogram())
+        histogram.add(end - start)
+        recorder = tracer
+        if recorder is not None:
+            recorder.add(self.name, stage, start, end)
+
+    def reset(self) -> None:
+        self.stages = {}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage: histogram.summary() for stage, histogram in list(self.stages.items())}
+
+
+class TraceRecorder:
+    """ Keeps the most recent stage events for a Chrome trace.
+
+    The saved file loads in chrome://tracing or Perfetto, one row per thread
+    and one slice per stage, named after the stage with the camera as its
+    category.
+    """
+
+    def __init__(self, limit: int = 100000) -> None:
+        self.events: Deque[Tuple[str, str, int, float, float]] = deque(maxlen=limit)
+        self.threads: Dict[int, str] = {}
+
+    def add(self, camera: str, stage: str, start: float, end: float) -> None:
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+        self.events.append((camera, stage, tid, start, end))
+
+    def traceEvents(self) -> List[Dict[str, Any]]:
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self.threads.items())]
+        for camera, stage, tid, start, end in list(self.events):
+            events.append({'name': stage, 'cat': camera, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': start * 1e6, 'dur': (end - start) * 1e6})
+        return events
+
+    def save(self, filename: str) -> int:
+        """ Write the events as Chrome trace-event JSON, returning how many. """
+        events = self.traceEvents()
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+# Set while a trace is being recorded, every StageTimings feeds it.
+tracer: Optional[TraceRecorder] = None
+
+
+def start_trace(limit: int = 100000) -> TraceRecorder:
+    global tracer
+    tracer = TraceRecorder(limit)
+    return tracer
+
+
+def stop_trace(filename: Optional[str] = None) -> int:
+    """ Stop recording, saving the trace if a filename is given. """
+    global tracer
+    recorder, tracer = tracer, None
+    if recorder is None or filename is None:
+        return 0
+    return recorder.save(filename)
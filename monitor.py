@@ -24,8 +24,7 @@ from qtpy.QtWidgets import (
 from microscope.microscope import Microscope
 from microscope.container import Container
 from microscope.settings import Settings
-from microscope.plugins import (ZoomPlugin, GridPlugin, PresetPlugin, ScalePlugin,
-                                TogglePlugin, CrossHairPlugin, RecordPlugin)
+from microscope.plugins import plugin
 
 
 class Form(QMainWindow):
@@ -33,15 +32,19 @@ class Form(QMainWindow):
         super(Form, self).__init__(parent)
         # Create widgets
         self.setWindowTitle("NSLS-II Microscope Widget")
-        self.container = Container(self, plugins=[TogglePlugin])
+        # Specs import each plugin's module when the widget creates it.
+        self.container = Container(self, plugins=[plugin('TogglePlugin')])
         self.container.count = 3
         self.container.size = [2, 2]
         self.microscope = self.container.microscope(0)
         #self.microscope = Microscope(self)
-        plugins = [ZoomPlugin, GridPlugin, CrossHairPlugin, PresetPlugin, ScalePlugin]
+        plugins = [plugin(name) for name in ('ZoomPlugin', 'GridPlugin', 'CrossHairPlugin',
+                                             'PresetPlugin', 'ScalePlugin', 'HistoryPlugin')]
         self.main_microscope = Microscope(self, viewport=False, plugins=plugins)
         self.main_microscope.scale = [0, 500]
         self.main_microscope.fps = 30
+        # Keep the main view at full rate, slow the thumbnails first.
+        self.main_microscope.priority = 10
 
         self.startButton = QPushButton('Start')
         self.settingsButton = QPushButton('Settings')
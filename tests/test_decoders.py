@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('qtpy')
+
+from qtpy.QtCore import QBuffer, QIODevice  # noqa: E402
+from qtpy.QtGui import QColor, QGuiApplication, QImage  # noqa: E402
+
+from microscope.widgets import decoders  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def jpeg():
+    app = QGuiApplication.instance() or QGuiApplication([])
+    image = QImage(320, 240, QImage.Format_RGB32)
+    image.fill(QColor(200, 40, 40))
+    buffer = QBuffer()
+    buffer.open(QIODevice.WriteOnly)
+    assert image.save(buffer, 'JPG')
+    yield bytes(buffer.data())
+    del app
+
+
+def test_default_chain_decodes(jpeg):
+    # The first decode calibrates, which runs every available backend.
+    image = decoders.decoder_chain().decode(jpeg)
+    assert (image.width(), image.height()) == (320, 240)
+
+
+@pytest.mark.parametrize('name', decoders.available_decoders())
+def test_backend_decodes(jpeg, name):
+    decoder = decoders.DECODERS[name]()
+    assert decoder.decode(jpeg).width() == 320
+    image = decoder.decode(jpeg, crop=(16, 16, 64, 32))
+    assert (image.width(), image.height()) == (64, 32)
+    image = decoder.decode(jpeg, size=(80, 60))
+    assert 80 <= image.width() < 320